@@ -0,0 +1,60 @@
+# Fichier : analyse_prix.py
+import numpy as np
+import pandas as pd
+from config_shared import PRIX_MOYEN_PAR_COLLECTION, SEUIL_BONNE_AFFAIRE, SEUIL_TRES_BONNE_AFFAIRE
+
+def classer_affaires(prix, nb_pieces, collection):
+    """
+    Version vectorisée de l'analyse "bonne affaire".
+    Prend trois Series alignées et retourne une Series : 'tres_bonne', 'bonne' ou 'standard'.
+    """
+    nb_pieces = pd.to_numeric(nb_pieces, errors='coerce')
+    prix_moyen = collection.map(PRIX_MOYEN_PAR_COLLECTION).fillna(PRIX_MOYEN_PAR_COLLECTION['default'])
+    prix_juste = nb_pieces * prix_moyen
+    verdict = np.select(
+        [prix <= prix_juste * SEUIL_TRES_BONNE_AFFAIRE, prix <= prix_juste * SEUIL_BONNE_AFFAIRE],
+        ["tres_bonne", "bonne"],
+        default="standard"
+    )
+    return pd.Series(verdict, index=prix.index)
+
+def derniers_prix_par_site(df_historique):
+    """
+    Calcule depuis un historique complet le même instantané que historique_prix.charger_derniers_prix() :
+    une ligne par (ID_Set, Site) avec le dernier prix, sa date, le prix le plus bas et sa date.
+    """
+    historique_trie = df_historique.sort_values('Date', kind='stable').reset_index(drop=True)
+    groupes = historique_trie.groupby(['ID_Set', 'Site'])
+    derniers = groupes[['Prix', 'Date']].last()
+    minimums = historique_trie.loc[groupes['Prix'].idxmin().values, ['Prix', 'Date']]
+    derniers['Prix_Min'] = minimums['Prix'].values
+    derniers['Date_Prix_Min'] = minimums['Date'].values
+    return derniers.reset_index()
+
+def analyser_meilleurs_prix(df_aujourdhui, df_derniers_prix, df_config):
+    """
+    Compare en une seule passe les meilleurs prix du jour au dernier meilleur prix du marché.
+    df_derniers_prix est l'instantané (ID_Set, Site) -> dernier prix connu avant aujourd'hui.
+    Retourne la table des alertes (une ligne par set dont le meilleur prix a baissé),
+    avec l'analyse "bonne affaire" déjà calculée.
+    """
+    # 1. Meilleure offre du jour pour chaque set
+    index_meilleures = df_aujourdhui.groupby('ID_Set', sort=False)['Prix'].idxmin()
+    meilleures_offres = df_aujourdhui.loc[index_meilleures, ['ID_Set', 'Nom_Set', 'Site', 'URL', 'Prix']]
+    meilleures_offres = meilleures_offres.rename(columns={'Nom_Set': 'nom_set', 'Site': 'site', 'URL': 'url', 'Prix': 'nouveau_prix'})
+
+    # 2. Dernier meilleur prix du marché : minimum des derniers prix de chaque site
+    meilleur_prix_precedent = df_derniers_prix.groupby('ID_Set')['Prix'].min().rename('prix_precedent')
+
+    # 3. Jointure : les sets sans historique ne peuvent pas déclencher d'alerte
+    alertes = meilleures_offres.join(meilleur_prix_precedent, on='ID_Set', how='inner')
+    alertes = alertes[alertes['nouveau_prix'] < alertes['prix_precedent']]
+
+    # 4. Analyse "bonne affaire" à partir de la configuration
+    infos_config = df_config.drop_duplicates('ID_Set').set_index('ID_Set').reindex(columns=['nbPieces', 'Collection', 'Image_URL'])
+    infos_alertes = infos_config.reindex(alertes['ID_Set'].values).set_axis(alertes.index)
+    alertes = alertes.assign(
+        image_url=infos_alertes['Image_URL'].fillna(''),
+        analyse_affaire=classer_affaires(alertes['nouveau_prix'], infos_alertes['nbPieces'], infos_alertes['Collection'])
+    )
+    return alertes.reset_index(drop=True)
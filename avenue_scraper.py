@@ -1,29 +1,81 @@
-# Fichier : avenue_scraper.py (Version Selenium)
+# Fichier : avenue_scraper.py (HTTP, avec Selenium en secours)
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
 import logging
 import json
-import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.keys import Keys
+import os
+import re
 from config_shared import MAP_VENDEURS
+from scrapers import moteur_http, planificateur, consentement, navigateur, strategie
+from scrapers.analyse_html import parser_page
 
 # --- CONFIGURATION ---
 FICHIER_CONFIG_EXCEL = "config_sets.xlsx"
 FICHIER_OUTPUT_JSON = "deals_du_jour.json"
 URL_BASE_AVENUE = "https://www.avenuedelabrique.com/"
+REQUETES_PAR_MINUTE_AVENUE = 20 # Une page toutes les 3 secondes
+# Mode HTTP : nombre de pages demandées en même temps (le rythme reste fixé par le planificateur)
+CONCURRENCE_AVENUE = int(os.getenv('CONCURRENCE_AVENUE', 4))
+HEADERS_HTTP = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36',
+    'Accept-Language': 'fr-FR,fr;q=0.9'
+}
+# Une seule expression régulière pour reconnaître tous les vendeurs suivis dans le texte alternatif des logos.
+# Un groupe nommé par vendeur : le groupe qui a reconnu le texte donne directement le site, quelle que soit la casse.
+SITES_PAR_GROUPE = {f"vendeur_{numero}": site for numero, site in enumerate(MAP_VENDEURS.values())}
+REGEX_VENDEURS = re.compile(
+    "|".join(f"(?P<vendeur_{numero}>{re.escape(vendeur)})" for numero, vendeur in enumerate(MAP_VENDEURS)), re.IGNORECASE
+)
+# Index set -> URL de la page produit, trouvée une fois par la recherche puis réutilisée directement
+FICHIER_INDEX_URLS = "urls_avenue.json"
+
+def charger_index_urls():
+    """Charge l'index des URL de pages produit déjà résolues par la recherche."""
+    try:
+        with open(FICHIER_INDEX_URLS, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def sauvegarder_index_urls(index_urls):
+    """Écrit l'index des URL (fichier temporaire puis renommage, pour ne jamais laisser un fichier à moitié écrit)."""
+    fichier_temporaire = FICHIER_INDEX_URLS + ".tmp"
+    with open(fichier_temporaire, 'w', encoding='utf-8') as f:
+        json.dump(index_urls, f, ensure_ascii=False, indent=4, sort_keys=True)
+    os.replace(fichier_temporaire, FICHIER_INDEX_URLS)
+
+def attendre_comparateur(wait):
+    """Attend le comparateur de prix de la page produit. Retourne False s'il n'apparaît pas."""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    try:
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.prodf-comp-px")))
+        return True
+    except TimeoutException:
+        return False
+
+def rechercher_set(driver, wait, set_id):
+    """Tape le numéro du set dans la recherche du site, depuis la page d'accueil."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.common.keys import Keys
+    logging.info(f"Recherche automatique pour le set {set_id}...")
+    planificateur.attendre_creneau(URL_BASE_AVENUE, palier="navigateur")
+    driver.get(URL_BASE_AVENUE)
+    consentement.accepter_banniere(driver, (By.ID, "cookie_tout_accepter"))
+
+    champ_recherche = wait.until(EC.visibility_of_element_located((By.ID, "RechercheRecherche")))
+    champ_recherche.clear()
+    champ_recherche.send_keys(set_id)
+    champ_recherche.send_keys(Keys.RETURN)
 
 def extraire_offres_de_la_page(soup):
     """
     Fonction unique qui prend une page parsée (soup) et en extrait les offres.
-    C'est notre "extracteur" de base.
+    C'est notre "extracteur" de base : il ne garde que la meilleure offre de chaque site suivi.
     """
-    offres_trouvees = []
+    meilleures_offres_par_site = {}
     offres_html = soup.find_all('div', class_='prodf-px')
     
     for offre in offres_html:
@@ -31,101 +83,158 @@ def extraire_offres_de_la_page(soup):
         lien_tag = offre.find('a')
         prix_brut = offre.get('data-prix')
         
-        if not all([logo_img, logo_img.has_attr('alt'), lien_tag, lien_tag.has_attr('href'), prix_brut]):
+        if not (logo_img and logo_img.has_attr('alt') and lien_tag and lien_tag.has_attr('href') and prix_brut):
             continue
         
-        alt_text = logo_img['alt'].lower()
-        vendeur_assigne = None
-        for vendeur_keyword, nom_site in MAP_VENDEURS.items():
-            if vendeur_keyword in alt_text:
-                vendeur_assigne = nom_site
-                break
-        
-        if vendeur_assigne:
-            url_relative = lien_tag['href']
-            url_absolue = f"{URL_BASE_AVENUE}{url_relative.lstrip('/')}"
-            
-            offres_trouvees.append({
-                "site": vendeur_assigne,
-                "url": url_absolue,
-                "prix": float(prix_brut)
-            })
-        else:
+        match_vendeur = REGEX_VENDEURS.search(logo_img['alt'])
+        if not match_vendeur:
             logging.info(f"  -> Vendeur non suivi ignoré (alt: '{logo_img['alt']}')")
+            continue
+
+        site = SITES_PAR_GROUPE[match_vendeur.lastgroup]
+        prix = float(prix_brut)
+        if site in meilleures_offres_par_site and prix >= meilleures_offres_par_site[site]['prix']:
+            continue
+        url_relative = lien_tag['href']
+        meilleures_offres_par_site[site] = {
+            "site": site,
+            "url": f"{URL_BASE_AVENUE}{url_relative.lstrip('/')}",
+            "prix": prix
+        }
     
-    return offres_trouvees
+    return list(meilleures_offres_par_site.values())
 
-def main():
-    """Script principal pour scraper Avenue de la Brique."""
-    logging.info("Lancement du scraper d'Avenue de la Brique...")
+def recuperer_offres_http(session, set_id, url):
+    """
+    Mode sans navigateur : les blocs d'offres sont présents dans le HTML servi par le site.
+    Retourne la liste des offres, ou None si la page doit être reprise avec Selenium
+    (erreur, page de blocage, comparateur absent).
+    """
     try:
-        df_config = pd.read_excel(FICHIER_CONFIG_EXCEL, dtype=str).fillna('')
-    except FileNotFoundError:
-        logging.error(f"'{FICHIER_CONFIG_EXCEL}' introuvable. Arrêt.")
-        return
-
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--window-size=1920,1080")
-    driver = webdriver.Chrome(options=options)
+        reponse = planificateur.requete_get(session, url, timeout=15)
+        if strategie.est_un_mur(reponse):
+            logging.info(f"  -> Page de blocage pour le set {set_id}, reprise avec le navigateur.")
+            return None
+        reponse.raise_for_status()
+    except Exception as e:
+        logging.info(f"  -> Échec HTTP pour le set {set_id} ({e}), reprise avec le navigateur.")
+        return None
+
+    if b"prodf-comp-px" not in reponse.content:
+        logging.info(f"  -> Pas de comparateur dans le HTML du set {set_id}, reprise avec le navigateur.")
+        return None
+    return extraire_offres_de_la_page(parser_page(reponse.content, 'div.prodf-px'))
+
+def traiter_sets_selenium(sets_a_traiter, index_urls):
+    """
+    Mode navigateur (secours) : URL connue ou recherche sur le site.
+    `sets_a_traiter` est une liste de (set_id, url_avenue_specifique). Retourne {set_id: offres}.
+    """
+    offres_par_set = {}
+    if not sets_a_traiter:
+        return offres_par_set
+
+    logging.info(f"--- Passage au navigateur pour {len(sets_a_traiter)} set(s) ---")
+    from selenium.webdriver.support.ui import WebDriverWait
+    driver = navigateur.obtenir_driver()
     wait = WebDriverWait(driver, 10)
-    
-    deals_par_set = {}
-    for index, row in df_config.iterrows():
+    try:
+        for set_id, url_avenue_specifique in sets_a_traiter:
+            try:
+                # URL de la config en priorité, sinon celle mémorisée lors d'une recherche précédente
+                url_connue = url_avenue_specifique or index_urls.get(set_id)
+                page_trouvee = False
+                if url_connue:
+                    logging.info(f"Utilisation de l'URL {'directe' if url_avenue_specifique else 'mémorisée'} pour le set {set_id}...")
+                    planificateur.attendre_creneau(url_connue, palier="navigateur")
+                    driver.get(url_connue)
+                    page_trouvee = attendre_comparateur(wait)
+                    if not page_trouvee and not url_avenue_specifique:
+                        logging.info(f"  -> Plus de comparateur sur l'URL mémorisée pour le set {set_id}, elle est oubliée.")
+                        del index_urls[set_id]
+
+                if not page_trouvee and not url_avenue_specifique:
+                    rechercher_set(driver, wait, set_id)
+                    page_trouvee = attendre_comparateur(wait)
+                    if page_trouvee:
+                        index_urls[set_id] = driver.current_url
+
+                if not page_trouvee:
+                    logging.warning(f"Pas de comparateur de prix trouvé pour le set {set_id} sur Avenue de la Brique.")
+                    continue
+
+                soup = parser_page(driver.page_source, 'div.prodf-px')
+
+                # On appelle notre extracteur unique
+                offres_par_set[set_id] = extraire_offres_de_la_page(soup)
+
+            except Exception as e:
+                logging.error(f"Erreur lors du traitement du set {set_id} sur Avenue de la Brique : {e}")
+    finally:
+        navigateur.liberer_driver(driver)
+    return offres_par_set
+
+def main(df_config=None):
+    """
+    Script principal pour scraper Avenue de la Brique.
+    Retourne les offres par set (aussi écrites dans deals_du_jour.json), ou None si la config est introuvable.
+    """
+    logging.info("Lancement du scraper d'Avenue de la Brique...")
+    if df_config is None:
+        try:
+            df_config = pd.read_excel(FICHIER_CONFIG_EXCEL, dtype=str).fillna('')
+        except FileNotFoundError:
+            logging.error(f"'{FICHIER_CONFIG_EXCEL}' introuvable. Arrêt.")
+            return None
+
+    planificateur.configurer_domaine(URL_BASE_AVENUE, REQUETES_PAR_MINUTE_AVENUE)
+    index_urls = charger_index_urls()
+
+    # --- 1. Mode HTTP pour tous les sets dont l'URL est connue (config ou index) ---
+    taches_http = []
+    sets_navigateur = []
+    for _, row in df_config.iterrows():
         set_id = row['ID_Set']
         url_avenue_specifique = row.get('URL_AvenueDeLaBrique')
-        
+        url_connue = url_avenue_specifique or index_urls.get(set_id)
+        if url_connue:
+            taches_http.append({'url': url_connue, 'set_id': set_id, 'url_specifique': url_avenue_specifique})
+        else:
+            # La recherche sur le site nécessite le navigateur
+            sets_navigateur.append((set_id, url_avenue_specifique))
+
+    offres_par_set = {}
+    if taches_http:
+        session = moteur_http.creer_session(HEADERS_HTTP, taille_pool=CONCURRENCE_AVENUE)
         try:
-            if url_avenue_specifique:
-                logging.info(f"Utilisation de l'URL directe pour le set {set_id}...")
-                driver.get(url_avenue_specifique)
+            resultats = moteur_http.executer_en_parallele(
+                taches_http,
+                lambda tache: recuperer_offres_http(session, tache['set_id'], tache['url']),
+                concurrence_globale=CONCURRENCE_AVENUE,
+                concurrence_par_domaine=CONCURRENCE_AVENUE
+            )
+        finally:
+            session.close()
+        for tache, offres in zip(taches_http, resultats):
+            if offres is None:
+                sets_navigateur.append((tache['set_id'], tache['url_specifique']))
             else:
-                logging.info(f"Recherche automatique pour le set {set_id}...")
-                driver.get(URL_BASE_AVENUE)
-                try:
-                    wait.until(EC.element_to_be_clickable((By.ID, "cookie_tout_accepter"))).click()
-                except Exception: pass
-
-                champ_recherche = wait.until(EC.visibility_of_element_located((By.ID, "RechercheRecherche")))
-                champ_recherche.clear()
-                champ_recherche.send_keys(set_id)
-                champ_recherche.send_keys(Keys.RETURN)
-            
-            # Attente commune pour les deux cas
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.prodf-comp-px")))
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            
-            # On appelle notre extracteur unique
-            offres = extraire_offres_de_la_page(soup)
-            if offres:
-                deals_par_set[set_id] = offres
-        
-        except Exception as e:
-            logging.error(f"Erreur lors du traitement du set {set_id} sur Avenue de la Brique : {e}")
-        
-        time.sleep(3)
-    
-    driver.quit()
-    
-    # Le dédoublonnage reste le même
-    deals_finaux = {}
-    logging.info("Nettoyage des offres pour ne garder que la meilleure par site...")
-    for set_id, offres in deals_par_set.items():
-        meilleures_offres_par_site = {}
-        for offre in offres:
-            site = offre['site']
-            prix = offre['prix']
-            if site not in meilleures_offres_par_site or prix < meilleures_offres_par_site[site]['prix']:
-                meilleures_offres_par_site[site] = offre
-        if meilleures_offres_par_site:
-            deals_finaux[set_id] = list(meilleures_offres_par_site.values())
+                offres_par_set[tache['set_id']] = offres
+        logging.info(f"Mode HTTP : {len(offres_par_set)}/{len(taches_http)} set(s) traités sans navigateur.")
+
+    # --- 2. Selenium uniquement pour les recherches et les pages que le mode HTTP n'a pas su lire ---
+    offres_par_set.update(traiter_sets_selenium(sets_navigateur, index_urls))
+    sauvegarder_index_urls(index_urls)
+
+    # On garde l'ordre de la config pour un fichier de sortie stable (une seule offre par site, la meilleure)
+    deals_finaux = {set_id: offres_par_set[set_id] for set_id in df_config['ID_Set'] if offres_par_set.get(set_id)}
     
     with open(FICHIER_OUTPUT_JSON, 'w', encoding='utf-8') as f:
         json.dump(deals_finaux, f, ensure_ascii=False, indent=4)
         
     logging.info(f"Scraping d'Avenue de la Brique terminé. Résultats dans '{FICHIER_OUTPUT_JSON}'.")
+    return deals_finaux
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-    main()
\ No newline at end of file
+    import pipeline
+    pipeline.main(["avenue"])
\ No newline at end of file
@@ -0,0 +1,103 @@
+# Fichier : bench_analyse.py
+# Benchmark de la phase d'analyse de catch_lego_price.py sur des historiques synthétiques.
+# Usage : python bench_analyse.py --sets 1000 --annees 3
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import analyse_prix
+from config_shared import PRIX_MOYEN_PAR_COLLECTION, SEUIL_BONNE_AFFAIRE, SEUIL_TRES_BONNE_AFFAIRE
+
+SITES = ["Amazon", "Lego", "Auchan", "Leclerc", "Carrefour"]
+COLLECTIONS = list(PRIX_MOYEN_PAR_COLLECTION.keys())
+
+def generer_donnees(nb_sets, nb_jours, nb_sites, graine=42):
+    """Crée une config, un historique (un scan par jour et par site) et les prix du jour."""
+    rng = np.random.default_rng(graine)
+    ids = [str(10000 + i) for i in range(nb_sets)]
+    sites = SITES[:nb_sites]
+    nb_pieces = rng.integers(100, 4000, nb_sets)
+
+    df_config = pd.DataFrame({
+        'ID_Set': ids,
+        'Nom_Set': [f"Set {i}" for i in ids],
+        'nbPieces': nb_pieces.astype(str),
+        'Collection': rng.choice(COLLECTIONS, nb_sets),
+        'Image_URL': '',
+    })
+
+    dates = pd.date_range("2023-01-01", periods=nb_jours, freq="D").strftime('%Y-%m-%d %H:%M:%S')
+    nb_lignes = nb_sets * nb_jours * nb_sites
+    prix_base = np.repeat(nb_pieces * 0.1, nb_jours * nb_sites)
+    df_historique = pd.DataFrame({
+        'Date': np.tile(np.repeat(dates, nb_sites), nb_sets),
+        'ID_Set': np.repeat(ids, nb_jours * nb_sites),
+        'Nom_Set': '',
+        'Site': np.tile(sites, nb_sets * nb_jours),
+        'Prix': np.round(prix_base * rng.uniform(0.6, 1.1, nb_lignes), 2),
+        'URL': '',
+    })
+
+    df_aujourdhui = pd.DataFrame({
+        'Date': "2026-01-01 05:00:00",
+        'ID_Set': np.repeat(ids, nb_sites),
+        'Nom_Set': np.repeat(df_config['Nom_Set'].values, nb_sites),
+        'Site': np.tile(sites, nb_sets),
+        'Prix': np.round(np.repeat(nb_pieces * 0.1, nb_sites) * rng.uniform(0.55, 1.1, nb_sets * nb_sites), 2),
+        'URL': '',
+    })
+    return df_config, df_historique, df_aujourdhui
+
+def analyse_par_boucle(df_aujourdhui, df_historique_precedent, df_config):
+    """Ancienne implémentation de référence : un filtrage complet de l'historique par set."""
+    alertes = []
+    for set_id in df_aujourdhui['ID_Set'].unique():
+        prix_set_aujourdhui = df_aujourdhui[df_aujourdhui['ID_Set'] == set_id]
+        meilleur_prix_aujourdhui = prix_set_aujourdhui['Prix'].min()
+        df_set_historique_precedent = df_historique_precedent[df_historique_precedent['ID_Set'] == set_id]
+        if df_set_historique_precedent.empty:
+            continue
+        meilleur_prix_precedent = df_set_historique_precedent.sort_values('Date').groupby('Site')['Prix'].last().min()
+        if meilleur_prix_aujourdhui < meilleur_prix_precedent:
+            analyse_affaire = "standard"
+            config_set_row_df = df_config.loc[df_config['ID_Set'] == set_id]
+            if not config_set_row_df.empty:
+                config_set_row = config_set_row_df.iloc[0]
+                nb_pieces = pd.to_numeric(config_set_row.get('nbPieces'), errors='coerce')
+                prix_moyen = PRIX_MOYEN_PAR_COLLECTION.get(config_set_row.get('Collection', 'default'), PRIX_MOYEN_PAR_COLLECTION['default'])
+                if meilleur_prix_aujourdhui <= nb_pieces * prix_moyen * SEUIL_TRES_BONNE_AFFAIRE:
+                    analyse_affaire = "tres_bonne"
+                elif meilleur_prix_aujourdhui <= nb_pieces * prix_moyen * SEUIL_BONNE_AFFAIRE:
+                    analyse_affaire = "bonne"
+            alertes.append((set_id, meilleur_prix_aujourdhui, meilleur_prix_precedent, analyse_affaire))
+    return alertes
+
+def chronometrer(fonction, *args):
+    debut = time.perf_counter()
+    resultat = fonction(*args)
+    return resultat, time.perf_counter() - debut
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de l'analyse des meilleurs prix.")
+    parser.add_argument("--sets", type=int, default=1000)
+    parser.add_argument("--annees", type=int, default=3)
+    parser.add_argument("--sites", type=int, default=3)
+    parser.add_argument("--sans-boucle", action="store_true", help="Ne pas chronométrer l'ancienne boucle (très lente sur les gros volumes).")
+    args = parser.parse_args()
+
+    # 'instantané' : reconstruction complète depuis l'historique (en production, l'instantané est lu tel quel)
+    print(f"{'sets':>6} {'lignes':>10} {'instantané (s)':>15} {'vectorisé (s)':>14} {'boucle (s)':>11}")
+    for fraction in (0.1, 0.25, 0.5, 1.0):
+        nb_sets = max(1, int(args.sets * fraction))
+        df_config, df_historique, df_aujourdhui = generer_donnees(nb_sets, 365 * args.annees, args.sites)
+        df_derniers_prix, duree_instantane = chronometrer(analyse_prix.derniers_prix_par_site, df_historique)
+        df_alertes, duree_vectorisee = chronometrer(analyse_prix.analyser_meilleurs_prix, df_aujourdhui, df_derniers_prix, df_config)
+
+        duree_boucle = float('nan')
+        if not args.sans_boucle:
+            alertes_boucle, duree_boucle = chronometrer(analyse_par_boucle, df_aujourdhui, df_historique, df_config)
+            attendu = sorted((a[0], a[3]) for a in alertes_boucle)
+            obtenu = sorted(zip(df_alertes['ID_Set'], df_alertes['analyse_affaire']))
+            assert attendu == obtenu, "Les deux implémentations ne donnent pas les mêmes alertes !"
+
+        print(f"{nb_sets:>6} {len(df_historique):>10} {duree_instantane:>15.3f} {duree_vectorisee:>14.3f} {duree_boucle:>11.3f}")
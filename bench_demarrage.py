@@ -0,0 +1,72 @@
+# Fichier : bench_demarrage.py
+# Benchmark du démarrage : temps d'import à froid de chaque point d'entrée, chacun dans un interpréteur neuf.
+# Les résultats de référence sont versionnés dans bench_demarrage.json pour repérer les régressions.
+# Usage : python bench_demarrage.py                 (compare à la référence, code de sortie 1 en cas de régression)
+#         python bench_demarrage.py --enregistrer   (met à jour la référence)
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# --- CONFIGURATION ---
+POINTS_D_ENTREE = ["pipeline", "config_generator", "avenue_scraper", "deal_hunter", "catch_lego_price", "generer_wiki"]
+# Dépendances lourdes qui ne doivent être chargées que par le code qui s'en sert (navigateur, graphiques, dépôt wiki)
+MODULES_DIFFERES = ["selenium", "selenium_stealth", "matplotlib", "git"]
+FICHIER_REFERENCE = "bench_demarrage.json"
+TOLERANCE = 1.3 # Régression signalée au-delà de +30% par rapport à la référence
+
+CODE_MESURE = """
+import json, sys, time
+debut = time.perf_counter()
+import {module}
+duree = time.perf_counter() - debut
+print(json.dumps({{"duree": duree, "charges": [m for m in {differes!r} if m in sys.modules]}}))
+"""
+
+def mesurer(module, repetitions):
+    """Médiane du temps d'import (ms) sur plusieurs interpréteurs neufs, et modules différés chargés malgré tout."""
+    durees = []
+    charges = []
+    for _ in range(repetitions):
+        sortie = subprocess.run([sys.executable, "-c", CODE_MESURE.format(module=module, differes=MODULES_DIFFERES)],
+                                capture_output=True, text=True, check=True)
+        resultat = json.loads(sortie.stdout.strip().splitlines()[-1])
+        durees.append(resultat["duree"] * 1000)
+        charges = resultat["charges"]
+    return statistics.median(durees), charges
+
+def charger_reference():
+    try:
+        with open(FICHIER_REFERENCE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps d'import à froid des points d'entrée.")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--enregistrer", action="store_true", help=f"Écrit les mesures dans {FICHIER_REFERENCE}.")
+    args = parser.parse_args()
+
+    reference = charger_reference()
+    mesures = {}
+    regressions = []
+    print(f"{'Point d entrée':<20} {'Import':>9} {'Référence':>10}  Modules différés chargés")
+    for module in POINTS_D_ENTREE:
+        duree, charges = mesurer(module, args.repetitions)
+        mesures[module] = round(duree, 1)
+        duree_reference = reference.get(module)
+        print(f"{module:<20} {duree:7.1f} ms {f'{duree_reference:.1f} ms' if duree_reference else '-':>10}  {', '.join(charges) or '-'}")
+        if charges:
+            regressions.append(f"{module} charge {', '.join(charges)} dès l'import")
+        if duree_reference and duree > duree_reference * TOLERANCE:
+            regressions.append(f"{module} : {duree:.1f} ms au lieu de {duree_reference:.1f} ms")
+
+    if args.enregistrer:
+        with open(FICHIER_REFERENCE, 'w', encoding='utf-8') as f:
+            json.dump(mesures, f, indent=2)
+        print(f"Référence mise à jour dans {FICHIER_REFERENCE}.")
+    elif regressions:
+        print("Régressions :\n- " + "\n- ".join(regressions))
+        sys.exit(1)
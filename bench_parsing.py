@@ -0,0 +1,57 @@
+# Fichier : bench_parsing.py
+# Micro-benchmark du parsing HTML des scrapers : html.parser complet contre scrapers.analyse_html.
+# Usage : python bench_parsing.py                                   (page synthétique façon fiche produit)
+#         python bench_parsing.py page_amazon.html "span.a-offscreen"  (page sauvegardée + sélecteur(s))
+import argparse
+import time
+from bs4 import BeautifulSoup
+from scrapers.analyse_html import PARSEUR_HTML, parser_page
+
+def generer_page(nb_blocs):
+    """Page lourde (menus, scripts, avis...) avec un seul bloc de prix noyé au milieu."""
+    blocs = [
+        f'<div class="bloc-{i} carte"><a href="/p/{i}"><img src="/img/{i}.jpg" alt="produit {i}"></a>'
+        f'<p class="desc">Description du produit {i} avec <b>du texte</b> et <span class="note">4,{i % 10}</span></p></div>'
+        for i in range(nb_blocs)
+    ]
+    blocs.insert(nb_blocs // 2, '<div class="corePrice"><span class="a-price"><span class="a-offscreen">129,99 €</span></span></div>')
+    return ('<html><head><script>var config = {};</script></head><body><nav>' + '<a href="#">lien</a>' * 200 + '</nav>'
+            + "".join(blocs) + '</body></html>').encode('utf-8')
+
+def chronometrer(fonction, repetitions):
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        resultat = fonction()
+    return (time.perf_counter() - debut) / repetitions, resultat
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark du parsing HTML des pages produit.")
+    parser.add_argument("page", nargs="?", help="Fichier HTML sauvegardé (sinon une page synthétique est générée).")
+    parser.add_argument("selecteurs", nargs="*", help="Sélecteur(s) CSS recherchés dans la page.")
+    parser.add_argument("--blocs", type=int, default=3000, help="Taille de la page synthétique.")
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.page:
+        with open(args.page, 'rb') as f:
+            contenu = f.read()
+        selecteurs = args.selecteurs or ["span.a-offscreen"]
+    else:
+        contenu = generer_page(args.blocs)
+        selecteurs = ["span.a-offscreen", "span.a-price-whole", "span.a-price-fraction"]
+
+    print(f"Page de {len(contenu) / 1024:.0f} Ko, sélecteurs {selecteurs}, parseur rapide : {PARSEUR_HTML}")
+
+    def extraire(soup):
+        element = soup.select_one(selecteurs[0])
+        return element.get_text(strip=True) if element else None
+
+    duree_complet, attendu = chronometrer(lambda: extraire(BeautifulSoup(contenu, 'html.parser')), args.repetitions)
+    duree_rapide_complet, _ = chronometrer(lambda: extraire(parser_page(contenu)), args.repetitions)
+    duree_rapide, obtenu = chronometrer(lambda: extraire(parser_page(contenu, selecteurs)), args.repetitions)
+
+    print(f"html.parser, page complète : {duree_complet * 1000:8.1f} ms")
+    print(f"{PARSEUR_HTML}, page complète : {duree_rapide_complet * 1000:8.1f} ms")
+    print(f"{PARSEUR_HTML} + SoupStrainer : {duree_rapide * 1000:8.1f} ms (x{duree_complet / duree_rapide:.1f})")
+    assert obtenu == attendu, f"Résultats différents : {obtenu!r} != {attendu!r}"
+    print(f"Même extraction dans les deux cas : {obtenu!r}")
@@ -1,37 +1,40 @@
 import pandas as pd
 from datetime import datetime
-import time
 import urllib3
 import os
 import logging
-import requests
 import json
-from config_shared import PRIX_MOYEN_PAR_COLLECTION, SEUIL_BONNE_AFFAIRE, SEUIL_TRES_BONNE_AFFAIRE
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium_stealth import stealth 
+from concurrent.futures import ThreadPoolExecutor
 
 import scrapers
+from scrapers import moteur_http, planificateur, cache_http, navigateur, strategie
 import email_manager
+import historique_prix
+import analyse_prix
 
 # --- CONFIGURATION GLOBALE ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# "paliers" : façons de récupérer le prix, de la moins chère à la plus chère (HTTP simple, puis navigateur Chrome).
+#   Le palier de départ est appris site par site (scrapers.strategie) ; un échec en HTTP est retenté en navigateur.
+# "requetes_par_minute" : débit maximum autorisé vers le site (appliqué par scrapers.planificateur)
+# "blocage" (sites Selenium) : ressources non téléchargées parmi images, medias, polices, tiers (absent = toutes, [] = aucune)
 CONFIG_SITES = {
-    "Amazon": { "type": "amazon", "use_selenium": True },
-    "Lego": { "type": "standard", "selecteur": '[data-test="product-price"]', "use_selenium": False },
-    "Auchan": { "type": "standard", "selecteur": ".product-price", "use_selenium": False },
-    "Leclerc": { "type": "standard", "selecteur": ".egToM .visually-hidden", "use_selenium": False },
-    "Carrefour": { "type": "carrefour", "selecteur": { "euros": ".product-price__content.c-text--size-m", "centimes": ".product-price__content.c-text--size-s" }, "use_selenium": True },
+    "Amazon": { "type": "amazon", "paliers": ["http", "navigateur"], "requetes_par_minute": 12, "blocage": ["images", "medias", "polices", "tiers"] },
+    "Lego": { "type": "standard", "selecteur": '[data-test="product-price"]', "paliers": ["http", "navigateur"], "requetes_par_minute": 12 },
+    "Auchan": { "type": "standard", "selecteur": ".product-price", "paliers": ["http", "navigateur"], "requetes_par_minute": 12 },
+    "Leclerc": { "type": "standard", "selecteur": ".egToM .visually-hidden", "paliers": ["http", "navigateur"], "requetes_par_minute": 12 },
+    "Carrefour": { "type": "carrefour", "selecteur": { "euros": ".product-price__content.c-text--size-m", "centimes": ".product-price__content.c-text--size-s" }, "paliers": ["http", "navigateur"], "requetes_par_minute": 12, "blocage": ["images", "medias", "polices", "tiers"] },
     # Ajoutez d'autres sites ici au besoin
 }
-FICHIER_EXCEL = "prix_lego.xlsx"
 FICHIER_CONFIG_EXCEL = 'config_sets.xlsx'
 
+# Moteur HTTP pour les sites sans Selenium : requêtes simultanées au total et par site
+CONCURRENCE_HTTP = int(os.getenv('CONCURRENCE_HTTP', 8))
+CONCURRENCE_HTTP_PAR_DOMAINE = int(os.getenv('CONCURRENCE_HTTP_PAR_DOMAINE', 1))
+# Nombre de navigateurs Chrome lancés en même temps (un par site Selenium)
+NB_NAVIGATEURS = int(os.getenv('NB_NAVIGATEURS', 2))
+
 # On regroupe la configuration email dans un dictionnaire
 EMAIL_CONFIG = {
     "adresse": os.getenv('GMAIL_ADDRESS'),
@@ -63,93 +66,175 @@ def regrouper_taches_par_site(df_config):
                     taches_par_site[site_nom] = []
                 
                 tache = site_config.copy()
+                tache['site'] = site_nom
                 tache['url'] = row[colonne_url]
                 tache['id_set'] = set_id
                 tache['nom_set'] = nom_set
                 taches_par_site[site_nom].append(tache)
     return taches_par_site
 
-def creer_driver_selenium(scraper_type="standard"):
+def executer_tache(tache, scraper_function, driver=None, headers=None, session=None):
+    """
+    Appelle le scraper d'une tâche avec les bons arguments.
+    Retourne la ligne d'historique à ajouter, ou None si aucun prix n'a été trouvé.
+    """
+    logging.info(f"Vérification de '{tache['nom_set']}' sur {tache['site']}...")
+    url_propre = tache['url'].strip().rstrip(':/')
+
+    try:
+        kwargs = {'url': url_propre}
+        if driver: kwargs['driver'] = driver
+        else:
+            kwargs['headers'] = headers
+            if session is not None: kwargs['session'] = session
+
+        if 'selecteur' in tache and tache['selecteur']:
+            if isinstance(tache['selecteur'], dict):
+                kwargs.update(tache['selecteur'])
+            else:
+                kwargs['selecteur'] = tache['selecteur']
+
+        prix_actuel = scraper_function(**kwargs)
+    except Exception as e:
+        logging.error(f"Erreur inattendue lors de l'appel du scraper pour {url_propre}: {e}")
+        prix_actuel = None # S'assurer que le prix est None en cas d'erreur
+
+    if prix_actuel is None:
+        logging.warning(f"Prix non trouvé pour {url_propre}.")
+        return None
+
+    return {
+        'Date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'ID_Set': tache['id_set'],
+        'Nom_Set': tache['nom_set'],
+        'Site': tache['site'],
+        'Prix': prix_actuel,
+        'URL': url_propre
+    }
+
+def traiter_taches_http(taches, scrapers_par_type, headers):
+    """
+    Traite toutes les tâches du palier HTTP avec le moteur HTTP :
+    une session partagée (connexions keep-alive) et des requêtes simultanées vers des sites différents.
+    Le temps total dépend du site le plus chargé, pas du nombre total d'URL.
+    Retourne (lignes trouvées, tâches en échec à retenter en navigateur).
+    """
+    if not taches:
+        return [], []
+    logging.info(f"--- Début du traitement HTTP parallèle ({len(taches)} tâches) ---")
+    session = moteur_http.creer_session(headers, taille_pool=CONCURRENCE_HTTP)
+    try:
+        resultats = moteur_http.executer_en_parallele(
+            taches,
+            lambda tache: executer_tache(tache, getattr(scrapers, scrapers_par_type[tache['type']]['http']), headers=headers, session=session),
+            concurrence_globale=CONCURRENCE_HTTP,
+            concurrence_par_domaine=CONCURRENCE_HTTP_PAR_DOMAINE
+        )
+    finally:
+        session.close()
+    cache_http.journaliser_statistiques()
+
+    taches_en_echec = []
+    for tache, ligne in zip(taches, resultats):
+        strategie.enregistrer_resultat(tache['site'], 'http', ligne is not None)
+        if ligne is None:
+            taches_en_echec.append(tache)
+    return [ligne for ligne in resultats if ligne], taches_en_echec
+
+def configurer_planificateur(taches_par_site):
+    """Déclare au planificateur le débit de chaque domaine rencontré, d'après CONFIG_SITES."""
+    for site, taches in taches_par_site.items():
+        requetes_par_minute = CONFIG_SITES.get(site, {}).get('requetes_par_minute')
+        for tache in taches:
+            planificateur.configurer_domaine(tache['url'].strip(), requetes_par_minute)
+
+def creer_driver_selenium(scraper_type="standard", blocage=navigateur.BLOCAGE_DEFAUT):
     """
-    Crée et retourne une instance configurée du driver Chrome.
+    Crée et retourne une instance configurée du driver Chrome (voir scrapers.navigateur).
     Applique le mode 'stealth' pour les types de scrapers spécifiés.
     """
     logging.info(f"Création d'un driver Selenium (type: {scraper_type})")
-    
-    # Configuration "paranoïaque" pour un mimétisme humain maximal
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-gpu")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    
-    # Création de l'instance du driver
-    driver = webdriver.Chrome(options=options)
 
-    # --- Application conditionnelle du mode Stealth ---
     # Mettez ici la liste de tous les types de scrapers qui nécessitent le camouflage
     types_furtifs = ["fnac", "carrefour", "kingjouet"] # Ajoutez/retirez des types au besoin
-
     if scraper_type in types_furtifs:
         logging.info("  -> Activation du mode Stealth pour ce scraper.")
-        stealth(driver,
-                languages=["fr-FR", "fr"],
-                vendor="Google Inc.",
-                platform="Win32",
-                webgl_vendor="Intel Inc.",
-                renderer="Intel Iris OpenGL Engine",
-                fix_hairline=True)
-                
-    return driver
 
-def obtenir_localisation_ip():
+    return navigateur.obtenir_driver(blocage=blocage, furtif=scraper_type in types_furtifs)
+
+def traiter_site_selenium(site, taches, scrapers_par_type):
     """
-    Interroge le service ipinfo.io pour connaître le code pays de l'adresse IP actuelle.
-    Retourne le code pays (ex: 'FR', 'US', 'IE') ou None en cas d'erreur.
+    Traite toutes les tâches d'un site Selenium avec son propre navigateur
+    (mode stealth, localisation Amazon...). Peut tourner en parallèle avec les autres sites.
+    Retourne les lignes d'historique trouvées, dans l'ordre des tâches.
     """
+    logging.info(f"--- Début du traitement manuel pour : {site} ---")
+    scraper_type = CONFIG_SITES[site]['type']
+    scraper_function = getattr(scrapers, scrapers_par_type[scraper_type]['navigateur'])
+
+    driver = None
     try:
-        logging.info("Récupération de la localisation de l'IP...")
-        
-        # On fait un appel à l'API de ipinfo.io qui renvoie du JSON
-        reponse = requests.get("https://ipinfo.io/json", timeout=5)
-        
-        # Lève une exception si la requête a échoué (ex: statut 4xx ou 5xx)
-        reponse.raise_for_status()
-        
-        # On convertit la réponse JSON en dictionnaire Python
-        data = reponse.json()
-        
-        # On récupère la valeur de la clé 'country', avec 'N/A' comme valeur par défaut
-        pays = data.get('country', 'N/A')
-        
-        logging.info(f"Localisation détectée : Pays={pays}")
-        return pays
-        
-    except requests.exceptions.RequestException as e:
-        # Gère spécifiquement les erreurs de réseau (timeout, pas de connexion...)
-        logging.error(f"Impossible de contacter le service de localisation IP : {e}")
-        return None
+        driver = creer_driver_selenium(scraper_type, CONFIG_SITES[site].get('blocage', navigateur.BLOCAGE_DEFAUT))
+        # Localisation Amazon : cookies sauvegardés si possible, sinon la procédure complète
+        if scraper_type == "amazon":
+            from scrapers import amazon_scraper
+            if not amazon_scraper.preparer_session(driver):
+                navigateur.liberer_driver(driver, reutilisable=False) # On ferme le driver et on abandonne ce site
+                return []
     except Exception as e:
-        # Gère toutes les autres erreurs possibles (JSON invalide, etc.)
-        logging.error(f"Erreur inattendue lors de la récupération de la localisation de l'IP : {e}")
-        return None
-    
+        logging.error(f"Impossible de démarrer/préparer Selenium pour {site}: {e}")
+        if driver: navigateur.liberer_driver(driver, reutilisable=False)
+        return []
+
+    lignes = []
+    session_perdue = False
+    for numero, tache in enumerate(taches, 1):
+        nouvelle_ligne = executer_tache(tache, scraper_function, driver=driver)
+        strategie.enregistrer_resultat(site, 'navigateur', nouvelle_ligne is not None)
+        if nouvelle_ligne:
+            lignes.append(nouvelle_ligne)
+        # executer_tache absorbe les erreurs : un échec peut cacher un Chrome planté, inutile de continuer avec
+        elif not navigateur.est_vivant(driver):
+            logging.error(f"Session Selenium perdue pour {site} : {len(taches) - numero} tâche(s) restante(s) abandonnée(s).")
+            session_perdue = True
+            break
+    logging.info(f"Fin de la session Selenium pour {site}")
+    # Un navigateur planté ne doit pas servir au site suivant
+    navigateur.liberer_driver(driver, reutilisable=not session_perdue)
+    return lignes
+
+def traiter_sites_selenium(taches_par_site, scrapers_par_type):
+    """
+    Chaque site Selenium a son propre navigateur ; NB_NAVIGATEURS sites sont traités en même temps.
+    executor.map rend les résultats dans l'ordre des sites : la fusion reste déterministe.
+    """
+    lignes = []
+    if not taches_par_site:
+        return lignes
+    with ThreadPoolExecutor(max_workers=NB_NAVIGATEURS) as executor_selenium:
+        resultats_par_site = executor_selenium.map(
+            lambda site_et_taches: traiter_site_selenium(site_et_taches[0], site_et_taches[1], scrapers_par_type),
+            taches_par_site.items()
+        )
+        for lignes_du_site in resultats_par_site:
+            lignes.extend(lignes_du_site)
+    return lignes
+
 # --- FONCTION PRINCIPALE ---
-def verifier_les_prix():
+def verifier_les_prix(df_config=None, deals_avenue=None):
+    """
+    Collecte les prix du jour, envoie les alertes et complète l'historique.
+    Lancé par pipeline.py, reçoit la configuration et les deals d'Avenue de la Brique déjà en mémoire ;
+    sinon ils sont relus depuis config_sets.xlsx et deals_du_jour.json.
+    """
     logging.info("Lancement de la vérification des prix")
     
-    df_config = charger_configuration_sets_df(FICHIER_CONFIG_EXCEL)
+    if df_config is None:
+        df_config = charger_configuration_sets_df(FICHIER_CONFIG_EXCEL)
     if df_config is None: return
 
-    try:
-        df_historique_precedent = pd.read_excel(FICHIER_EXCEL, dtype={'ID_Set': str})
-    except FileNotFoundError:
-        df_historique_precedent = pd.DataFrame(columns=['Date', 'ID_Set', 'Nom_Set', 'Site', 'Prix', 'URL'])
+    # Seul le dernier prix connu par (set, site) est utile pour les alertes : on lit l'instantané, pas tout l'historique
+    df_derniers_prix = historique_prix.charger_derniers_prix()
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36',
@@ -162,11 +247,12 @@ def verifier_les_prix():
 
     # --- Phase 1a : Traitement Automatique via Avenue de la Brique ---
     logging.info("--- Début du traitement des deals d'Avenue de la Brique ---")
-    try:
-        with open('deals_du_jour.json', 'r', encoding='utf-8') as f:
-            deals_avenue = json.load(f)
-    except Exception:
-        deals_avenue = {}
+    if deals_avenue is None:
+        try:
+            with open('deals_du_jour.json', 'r', encoding='utf-8') as f:
+                deals_avenue = json.load(f)
+        except Exception:
+            deals_avenue = {}
 
     for set_id, offres in deals_avenue.items():
         config_set_row_df = df_config.loc[df_config['ID_Set'] == set_id]
@@ -196,13 +282,20 @@ def verifier_les_prix():
 
     # --- Phase 1b : Traitement Manuel pour les URL de la configuration ---
     taches_manuelles = regrouper_taches_par_site(df_config)
+    configurer_planificateur(taches_manuelles)
     
+    # Pour chaque type de site : le nom du scraper de chaque palier dans le paquet scrapers.
+    # Il n'est résolu qu'au moment de traiter une tâche, pour ne charger que les modules des sites configurés.
     SCRAPERS = {
-        "amazon": scrapers.scrape_amazon,
-        "carrefour": scrapers.scrape_carrefour,
-        "standard": scrapers.scrape_standard
+        "amazon": {"http": "scrape_amazon_http", "navigateur": "scrape_amazon"},
+        "carrefour": {"http": "scrape_carrefour_http", "navigateur": "scrape_carrefour"},
+        "standard": {"http": "scrape_standard", "navigateur": "scrape_standard_navigateur"}
     }
 
+    # On répartit d'abord les tâches selon le palier de départ appris pour chaque site :
+    # HTTP (moteur parallèle) d'un côté, navigateur Selenium de l'autre
+    taches_http = []
+    taches_selenium = {}
     for site, taches in taches_manuelles.items():
         # On filtre pour ne pas refaire le travail déjà fait par Avenue
         taches_a_faire = [t for t in taches if (t['id_set'], site) not in taches_traitees]
@@ -211,110 +304,42 @@ def verifier_les_prix():
             logging.info(f"--- Traitement manuel pour {site} ignoré (toutes les tâches ont été traitées via Avenue) ---")
             continue
 
-        logging.info(f"--- Début du traitement manuel pour : {site} ---")
         site_config = CONFIG_SITES.get(site)
         if not site_config: continue
-        
-        scraper_type = site_config.get('type')
-        scraper_function = SCRAPERS.get(scraper_type)
-        if not scraper_function: continue
-
-        driver = None
-        if site_config.get("use_selenium", False):
-            try:
-                driver = creer_driver_selenium(scraper_type)
-                if scraper_type == "amazon":
-                    pays_actuel = obtenir_localisation_ip()
-                    if pays_actuel and pays_actuel != 'FR':
-                        logging.info(f"IP non-française ({pays_actuel}) détectée. Forçage de la localisation pour Amazon...")
-                        try:
-                            driver.get("https://www.amazon.fr/")
-                            wait = WebDriverWait(driver, 10)
-                            
-                            # === DÉBUT DE LA MODIFICATION ===
-
-                            # 1. On gère les cookies sur la page d'accueil AVANT tout le reste
-                            try:
-                                bouton_cookies = wait.until(EC.element_to_be_clickable((By.ID, "sp-cc-accept")))
-                                bouton_cookies.click()
-                                logging.info("  -> Bannière de cookies sur la page d'accueil gérée.")
-                                time.sleep(1) # Petite pause pour laisser la bannière disparaître
-                            except Exception:
-                                logging.info("  -> Pas de bannière de cookies sur la page d'accueil.")
-
-                            # 2. On utilise un sélecteur plus robuste pour le bouton de localisation
-                            #    On cherche un lien ou un div qui a un ID contenant "location"
-                            xpath_localisation = "//*[@id='nav-global-location-popover-link' or @id='glow-ingress-block']"
-                            bouton_localisation = wait.until(
-                                EC.element_to_be_clickable((By.XPATH, xpath_localisation))
-                            )
-                            bouton_localisation.click()
-                            
-                            # 3. Le reste est inchangé car vos nouveaux extraits HTML le confirment
-                            champ_postal = wait.until(EC.visibility_of_element_located((By.ID, "GLUXZipUpdateInput")))
-                            champ_postal.clear() # On vide le champ au cas où il serait pré-rempli
-                            champ_postal.send_keys("38540")
-                            
-                            bouton_actualiser_container = wait.until(EC.element_to_be_clickable((By.ID, "GLUXZipUpdate")))
-                            bouton_actualiser_container.click()
-                            
-                            # 4. On attend que la page se recharge en vérifiant que le code postal est bien mis à jour
-                            wait.until(EC.text_to_be_present_in_element((By.ID, "glow-ingress-line2"), "38540"))
-                            logging.info("Localisation française pour Amazon forcée avec succès.")  
-                            
-                        except Exception as e:
-                            # Si la localisation échoue, c'est une erreur critique pour Amazon
-                            logging.error(f"La procédure de forçage de localisation pour Amazon a échoué : {e}")
-                            driver.quit() # On ferme le driver
-                            continue # ON PASSE AU SITE SUIVANT
-                            
-                    else:
-                        logging.info("IP française (ou non détectée), pas de forçage nécessaire pour Amazon.")
-
-            except Exception as e:
-                logging.error(f"Impossible de démarrer/préparer Selenium pour {site}: {e}")
-                if driver: driver.quit()
-                continue
-
-        for tache in taches_a_faire:
-            logging.info(f"Vérification de '{tache['nom_set']}'...")
-            
-            url_propre = tache['url'].strip().rstrip(':/')
-            
-            try:
-                kwargs = {'url': url_propre}
-                if driver: kwargs['driver'] = driver
-                else: kwargs['headers'] = headers
-                
-                if 'selecteur' in tache and tache['selecteur']:
-                    if isinstance(tache['selecteur'], dict):
-                        kwargs.update(tache['selecteur'])
-                    else:
-                        kwargs['selecteur'] = tache['selecteur']
-                
-                prix_actuel = scraper_function(**kwargs)
-            except Exception as e:
-                logging.error(f"Erreur inattendue lors de l'appel du scraper pour {url_propre}: {e}")
-                prix_actuel = None # S'assurer que le prix est None en cas d'erreur
-
-            if prix_actuel is not None:
-                nouvelle_ligne = {
-                    'Date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'ID_Set': tache['id_set'],
-                    'Nom_Set': tache['nom_set'],
-                    'Site': site,
-                    'Prix': prix_actuel,
-                    'URL': url_propre
-                }
-                lignes_a_ajouter.append(nouvelle_ligne)
-            else:
-                logging.warning("Prix non trouvé pour cette tâche.")
-            
-            time.sleep(5)
-        
-        if driver:
-            logging.info(f"Fermeture de la session Selenium pour {site}")
-            driver.quit()
+        if not SCRAPERS.get(site_config.get('type')): continue
+
+        palier = strategie.palier_initial(site, site_config.get('paliers', strategie.PALIERS))
+        logging.info(f"{site} : démarrage au palier '{palier}'.")
+        if palier == "navigateur":
+            taches_selenium[site] = taches_a_faire
+        else:
+            taches_http.extend(taches_a_faire)
+
+    # Les sites HTTP tournent en tâche de fond pendant que les navigateurs travaillent.
+    # Plus de pause fixe : chaque scraper attend le prochain créneau de son domaine auprès du planificateur.
+    executor_http = ThreadPoolExecutor(max_workers=1)
+    futur_http = executor_http.submit(traiter_taches_http, taches_http, SCRAPERS, headers)
+
+    lignes_a_ajouter.extend(traiter_sites_selenium(taches_selenium, SCRAPERS))
+
+    lignes_http, taches_en_echec = futur_http.result()
+    lignes_a_ajouter.extend(lignes_http)
+    executor_http.shutdown()
+
+    # Escalade : ce qui a échoué en HTTP (sélecteur absent, mur anti-bot...) est retenté dans un navigateur
+    taches_a_escalader = {}
+    for tache in taches_en_echec:
+        if "navigateur" in CONFIG_SITES[tache['site']].get('paliers', strategie.PALIERS):
+            taches_a_escalader.setdefault(tache['site'], []).append(tache)
+    if taches_a_escalader:
+        logging.info(f"--- Escalade vers le navigateur de {sum(len(t) for t in taches_a_escalader.values())} tâche(s) ---")
+        lignes_a_ajouter.extend(traiter_sites_selenium(taches_a_escalader, SCRAPERS))
+
+    strategie.journaliser()
+    try:
+        strategie.sauvegarder()
+    except OSError as e:
+        logging.warning(f"Impossible d'enregistrer les statistiques de stratégie : {e}")
 
     # --- ÉTAPE 2 : ANALYSE ---
     # === PHASE 2 : ANALYSE GLOBALE ET DÉCISION DE NOTIFICATION ===
@@ -326,85 +351,33 @@ def verifier_les_prix():
     # On crée un DataFrame avec tous les prix trouvés aujourd'hui
     df_aujourdhui = pd.DataFrame(lignes_a_ajouter)
     
-    # On identifie les sets pour lesquels on a des données aujourd'hui
-    sets_scannes_ids = df_aujourdhui['ID_Set'].unique()
-    
-    baisses_de_prix_a_notifier = []
-    
     logging.info("Analyse des changements pour les alertes de meilleur prix du marché...")
-    for set_id in sets_scannes_ids:
-        
-        # --- Comparaison J-1 vs J-0 ---
-        
-        # 1. On récupère les données de ce set pour AUJOURD'HUI
-        prix_set_aujourdhui = df_aujourdhui[df_aujourdhui['ID_Set'] == set_id]
-        meilleur_prix_aujourdhui = prix_set_aujourdhui['Prix'].min()
-        meilleure_offre_aujourdhui = prix_set_aujourdhui.loc[prix_set_aujourdhui['Prix'].idxmin()]
-        
-        # 2. On récupère l'historique de ce set AVANT aujourd'hui
-        df_set_historique_precedent = df_historique_precedent[df_historique_precedent['ID_Set'] == set_id]
-        
-        if df_set_historique_precedent.empty:
-            logging.info(f"Nouveau set {set_id} ou premier prix enregistré. Pas de comparaison possible pour une alerte.")
-            continue # C'est la première fois qu'on voit ce set, on ne peut pas comparer.
+    df_alertes = analyse_prix.analyser_meilleurs_prix(df_aujourdhui, df_derniers_prix, df_config)
 
-        # 3. On trouve le dernier meilleur prix connu sur le marché
-        #    On prend les derniers prix enregistrés pour chaque site, puis le minimum parmi ceux-là.
-        meilleur_prix_precedent = df_set_historique_precedent.sort_values('Date').groupby('Site')['Prix'].last().min()
-        
-        # === LA CONDITION D'ALERTE FINALE ===
-        if meilleur_prix_aujourdhui < meilleur_prix_precedent:
-            logging.info(f"🏆 Baisse du meilleur prix marché pour le set {set_id} ! Nouveau meilleur prix: {meilleur_prix_aujourdhui}€ (précédent: {meilleur_prix_precedent}€)")
-            
-            # On prépare les données pour l'email
-            nom_set = meilleure_offre_aujourdhui['Nom_Set']
-            site_offre = meilleure_offre_aujourdhui['Site']
-            url_offre = meilleure_offre_aujourdhui.get('URL', '#')
-            
-            # On exécute l'analyse "bonne affaire"
-            analyse_affaire = "standard"
-            image_url = ''
-            try:
-                config_set_row = df_config.loc[df_config['ID_Set'] == set_id].iloc[0]
-                nb_pieces = pd.to_numeric(config_set_row.get('nbPieces'), errors='coerce')
-                collection = config_set_row.get('Collection', 'default')
-                image_url = config_set_row.get('Image_URL', '')
-                
-                if pd.notna(nb_pieces):
-                    prix_moyen = PRIX_MOYEN_PAR_COLLECTION.get(collection, PRIX_MOYEN_PAR_COLLECTION['default'])
-                    prix_juste = nb_pieces * prix_moyen
-                    if meilleur_prix_aujourdhui <= prix_juste * SEUIL_TRES_BONNE_AFFAIRE:
-                        analyse_affaire = "tres_bonne"
-                    elif meilleur_prix_aujourdhui <= prix_juste * SEUIL_BONNE_AFFAIRE:
-                        analyse_affaire = "bonne"
-            except IndexError:
-                logging.warning(f"Infos de config manquantes pour le set {set_id} pour l'analyse.")
-
-            baisses_de_prix_a_notifier.append({
-                'nom_set': nom_set,
-                'nouveau_prix': meilleur_prix_aujourdhui,
-                'prix_precedent': meilleur_prix_precedent,
-                'site': site_offre,
-                'url': url_offre,
-                'image_url': image_url,
-                'analyse_affaire': analyse_affaire,
-                'est_un_record': True # On peut utiliser cette clé pour un message spécial
-            })
-        else:
-            logging.info(f"Meilleur prix pour le set {set_id} n'a pas baissé (Actuel: {meilleur_prix_aujourdhui}€ vs Précédent: {meilleur_prix_precedent}€).")
+    baisses_de_prix_a_notifier = []
+    for alerte in df_alertes.itertuples(index=False):
+        logging.info(f"🏆 Baisse du meilleur prix marché pour le set {alerte.ID_Set} ! Nouveau meilleur prix: {alerte.nouveau_prix}€ (précédent: {alerte.prix_precedent}€)")
+        baisses_de_prix_a_notifier.append({
+            'nom_set': alerte.nom_set,
+            'nouveau_prix': alerte.nouveau_prix,
+            'prix_precedent': alerte.prix_precedent,
+            'site': alerte.site,
+            'url': alerte.url,
+            'image_url': alerte.image_url,
+            'analyse_affaire': alerte.analyse_affaire,
+            'est_un_record': True # On peut utiliser cette clé pour un message spécial
+        })
+    logging.info(f"{len(baisses_de_prix_a_notifier)} baisse(s) du meilleur prix sur {df_aujourdhui['ID_Set'].nunique()} set(s) scanné(s) aujourd'hui.")
 
     # --- ÉTAPE 3 : NOTIFICATION ET SAUVEGARDE ---
     if baisses_de_prix_a_notifier:
         email_manager.envoyer_email_recapitulatif(baisses_de_prix_a_notifier, EMAIL_CONFIG)
         
-    # On sauvegarde l'historique complet, qui inclut les nouveaux prix du jour
-    df_historique_final = pd.concat([df_historique_precedent, df_aujourdhui], ignore_index=True)
-    df_historique_final.to_excel(FICHIER_EXCEL, index=False)
-    logging.info(f"{len(lignes_a_ajouter)} prix enregistrés/mis à jour dans le fichier Excel.")
+    # On ajoute uniquement les prix du jour à la fin de l'historique
+    nb_lignes = historique_prix.ajouter_prix(df_aujourdhui)
+    logging.info(f"{nb_lignes} prix ajoutés à l'historique '{historique_prix.FICHIER_HISTORIQUE_DB}'.")
 
 # --- POINT D'ENTRÉE ---
 if __name__ == "__main__":
-    if not all(EMAIL_CONFIG.values()):
-        logging.error("Variables d'environnement pour l'email non configurées. Arrêt.")
-    else:
-        verifier_les_prix()
\ No newline at end of file
+    import pipeline
+    pipeline.main(["prix"])
\ No newline at end of file
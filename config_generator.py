@@ -1,20 +1,28 @@
 import pandas as pd
 import os
 import re
-from bs4 import BeautifulSoup
 import logging
 import glob
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import json
+import requests
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import historique_prix
+from scrapers import moteur_http, navigateur, planificateur
+from scrapers.analyse_html import parser_page
 
 
 FICHIER_CONFIG_EXCEL = "config_sets.xlsx"
 FICHIER_LISTE_SETS = "sets_a_analyser.txt"
-FICHIER_HISTORIQUE = "prix_lego.xlsx"
+HEADERS_HTTP = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36',
+    'Accept-Language': 'fr-FR,fr;q=0.9'
+}
+NB_NAVIGATEURS_METADONNEES = int(os.getenv('NB_NAVIGATEURS_METADONNEES', 2)) # Navigateurs réutilisés pour tous les sets
+URL_PRODUIT_LEGO = "https://www.lego.com/fr-fr/product/{}"
+# Débit vers Lego.com (appliqué par scrapers.planificateur, pages HTTP et navigateur confondues)
+REQUETES_PAR_MINUTE_LEGO = int(os.getenv('REQUETES_PAR_MINUTE_LEGO', 30))
 
 # Dictionnaire pour mapper les domaines aux noms de colonnes dans l'Excel
 DOMAIN_TO_COLUMN_MAP = {
@@ -28,46 +36,119 @@ DOMAIN_TO_COLUMN_MAP = {
     "brickmo.com": "URL_Brickmo"
     # Ajoutez d'autres domaines au besoin
 }
-def get_lego_metadata(set_id):
-    """Scrape Lego.com pour récupérer les métadonnées d'un set en utilisant Selenium."""
-    logging.info(f"Récupération des métadonnées pour le set {set_id} sur Lego.com (via Selenium)...")
-    url = f"https://www.lego.com/fr-fr/product/{set_id}"
-    
-    # On utilise une configuration Selenium
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    chrome_options.add_experimental_option('useAutomationExtension', False)
-    
-    driver = webdriver.Chrome(options=chrome_options)
-    wait = WebDriverWait(driver, 10)
+def creer_driver_metadonnees():
+    """Crée le navigateur Chrome headless utilisé pour lire les pages produit de Lego.com."""
+    # Les URL d'images sont lues dans le DOM : inutile de les télécharger
+    return navigateur.obtenir_driver()
 
-    try:
-        driver.get(url)
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '[data-test="product-overview-name"]')))
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # --- NOM ET IMAGE ---
+def _chercher_cle(objet, cles):
+    """Parcourt récursivement un JSON (dict/list) et retourne la première valeur non vide d'une des clés."""
+    if isinstance(objet, dict):
+        for cle in cles:
+            valeur = objet.get(cle)
+            if valeur not in (None, "", [], {}) and not isinstance(valeur, (dict, list)):
+                return valeur
+        objets_enfants = objet.values()
+    elif isinstance(objet, list):
+        objets_enfants = objet
+    else:
+        return None
+    for enfant in objets_enfants:
+        valeur = _chercher_cle(enfant, cles)
+        if valeur is not None:
+            return valeur
+    return None
+
+def _noeud_produit(objet, set_id):
+    """Retourne le premier objet du JSON dont le code produit est set_id (et pas un produit suggéré), ou None."""
+    if isinstance(objet, dict):
+        if str(objet.get('productCode', '')).strip() == set_id:
+            return objet
+        objets_enfants = objet.values()
+    elif isinstance(objet, list):
+        objets_enfants = objet
+    else:
+        return None
+    for enfant in objets_enfants:
+        noeud = _noeud_produit(enfant, set_id)
+        if noeud is not None:
+            return noeud
+    return None
+
+def extraire_donnees_structurees(soup, set_id):
+    """
+    Lit les données embarquées dans le HTML rendu côté serveur : JSON-LD (schema.org Product),
+    données Next.js (__NEXT_DATA__) et balises og:. Retourne uniquement les champs trouvés.
+    Dans __NEXT_DATA__, seul le produit dont le code est set_id est lu : la page contient aussi
+    les produits suggérés, qui ont leurs propres nombres de pièces et thèmes.
+    """
+    donnees = {}
+
+    # 1. JSON-LD : nom et image du produit
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            contenu = json.loads(script.string or "")
+        except ValueError:
+            continue
+        for objet in (contenu if isinstance(contenu, list) else [contenu]):
+            if not isinstance(objet, dict) or objet.get('@type') != 'Product':
+                continue
+            if objet.get('name'):
+                donnees.setdefault('nom', objet['name'].strip())
+            image = objet.get('image')
+            if isinstance(image, list):
+                image = image[0] if image else None
+            if isinstance(image, dict):
+                image = image.get('url')
+            if image:
+                donnees.setdefault('image_url', image)
+
+    # 2. Données Next.js : nombre de pièces et thème du produit affiché
+    script_next = soup.find('script', id='__NEXT_DATA__')
+    if script_next and script_next.string:
+        try:
+            produit = _noeud_produit(json.loads(script_next.string), str(set_id).strip())
+        except ValueError:
+            produit = None
+        if produit:
+            pieces = _chercher_cle(produit, ('pieceCount',))
+            if pieces is not None and re.fullmatch(r'\d+', str(pieces)):
+                donnees.setdefault('nb_pieces', str(pieces))
+            theme = _chercher_cle(produit, ('themeName',))
+            if theme:
+                donnees.setdefault('collection', str(theme).strip())
+
+    # 3. Balises og: en dernier recours
+    meta_titre = soup.find('meta', property='og:title')
+    if meta_titre and meta_titre.get('content'):
+        donnees.setdefault('nom', meta_titre['content'].split('|')[0].strip())
+    meta_image = soup.find('meta', property='og:image')
+    if meta_image and meta_image.get('content'):
+        donnees.setdefault('image_url', meta_image['content'])
+
+    return donnees
+
+def extraire_metadonnees_page(soup, set_id):
+    """Extrait nom, image, nombre de pièces et collection d'une page produit Lego.com (données embarquées puis DOM)."""
+    donnees = extraire_donnees_structurees(soup, set_id)
+
+    # --- NOM ET IMAGE ---
+    nom_set = donnees.get('nom')
+    if not nom_set:
         nom_set_elem = soup.find('h1', {'data-test': 'product-overview-name'})
         nom_set = nom_set_elem.text.strip() if nom_set_elem else "Nom non trouvé"
-        
-        image_url = ""
-        image_elem = soup.select_one('[data-test="mediagallery-image-0"] source')
-        if image_elem and image_elem.has_attr('srcset'):
-            image_url = image_elem['srcset'].split(',')[0].split(' ')[0]
-        if not image_url:
-            meta_image = soup.find('meta', property='og:image')
-            if meta_image: image_url = meta_image['content']
-
-        # === NOMBRE DE PIÈCES ===
-        nb_pieces = "N/A"
-        # Plan A : Données d'accessibilité (le plus fiable)
+
+    image_url = ""
+    image_elem = soup.select_one('[data-test="mediagallery-image-0"] source')
+    if image_elem and image_elem.has_attr('srcset'):
+        image_url = image_elem['srcset'].split(',')[0].split(' ')[0]
+    if not image_url:
+        image_url = donnees.get('image_url', "")
+
+    # === NOMBRE DE PIÈCES ===
+    nb_pieces = donnees.get('nb_pieces', "N/A")
+    # Plan A : Données d'accessibilité (le plus fiable)
+    if nb_pieces == "N/A":
         try:
             pieces_p = soup.find(lambda tag: tag.name == 'p' and 'visually-hidden' in tag.get('class', []) and 'nombre de pièces' in tag.get_text(strip=True).lower())
             if pieces_p:
@@ -77,35 +158,155 @@ def get_lego_metadata(set_id):
         except Exception:
             pass # On continue silencieusement si ça échoue
 
-        # Plan B : Attribut data-test (si le Plan A a échoué)
-        if nb_pieces == "N/A":
-            logging.info("  -> Plan A pour les pièces (visually-hidden) a échoué, tentative du Plan B (data-test)...")
-            # On cherche l'un des data-test connus
-            pieces_elem = soup.select_one('[data-test="pieces-value"]')
-            if pieces_elem:
-                # On prend le texte de l'élément, qui devrait être le nombre
-                nb_pieces = pieces_elem.text.strip()
-        
-        # Message final si tout a échoué
-        if nb_pieces == "N/A":
-            logging.warning(f"Impossible de trouver le nombre de pièces pour {set_id} avec toutes les méthodes.")
-            
-        # --- COLLECTION ---
-        collection = "N/A"
-        collection_elem = soup.select_one('a[class*="BrandLink"] img')
-        if collection_elem and collection_elem.has_attr('alt'):
-            collection = collection_elem['alt'].strip().replace('Logo', '').strip()
-        
-        logging.info(f"Métadonnées récupérées : Nom='{nom_set}', Pièces='{nb_pieces}', Collection='{collection}'")
-        return { "nom": nom_set, "image_url": image_url, "nb_pieces": nb_pieces, "collection": collection, "url_lego": url }
-        
+    # Plan B : Attribut data-test (si le Plan A a échoué)
+    if nb_pieces == "N/A":
+        logging.info("  -> Plan A pour les pièces (visually-hidden) a échoué, tentative du Plan B (data-test)...")
+        # On cherche l'un des data-test connus
+        pieces_elem = soup.select_one('[data-test="pieces-value"]')
+        if pieces_elem:
+            # On prend le texte de l'élément, qui devrait être le nombre
+            nb_pieces = pieces_elem.text.strip()
+
+    # --- COLLECTION ---
+    collection = "N/A"
+    collection_elem = soup.select_one('a[class*="BrandLink"] img')
+    if collection_elem and collection_elem.has_attr('alt'):
+        collection = collection_elem['alt'].strip().replace('Logo', '').strip()
+    if collection == "N/A":
+        collection = donnees.get('collection', "N/A")
+
+    url = URL_PRODUIT_LEGO.format(set_id)
+    return { "nom": nom_set, "image_url": image_url, "nb_pieces": nb_pieces, "collection": collection, "url_lego": url }
+
+def champs_manquants(metadata):
+    """Liste les champs indispensables absents des métadonnées (la collection reste facultative)."""
+    if not metadata:
+        return ["nom", "image_url", "nb_pieces"]
+    manquants = []
+    if metadata['nom'] == "Nom non trouvé": manquants.append("nom")
+    if not metadata['image_url']: manquants.append("image_url")
+    if metadata['nb_pieces'] == "N/A": manquants.append("nb_pieces")
+    return manquants
+
+def get_lego_metadata_http(set_id, session=None):
+    """
+    Lit la page produit Lego.com en HTTP simple (sans navigateur) et en extrait les métadonnées.
+    Retourne None si la page n'a pas pu être téléchargée.
+    """
+    url = URL_PRODUIT_LEGO.format(set_id)
+    client = session if session is not None else requests
+    try:
+        reponse = planificateur.requete_get(client, url, headers=HEADERS_HTTP, timeout=10)
+        reponse.raise_for_status()
+    except Exception as e:
+        logging.info(f"  -> Lecture HTTP impossible pour {set_id} ({e}).")
+        return None
+    return extraire_metadonnees_page(parser_page(reponse.content), set_id)
+
+def get_lego_metadata_selenium(set_id, driver=None):
+    """
+    Scrape Lego.com pour récupérer les métadonnées d'un set en utilisant Selenium.
+    Si un driver est fourni, il est réutilisé et n'est pas fermé ; sinon un driver temporaire est créé.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    logging.info(f"Récupération des métadonnées pour le set {set_id} sur Lego.com (via Selenium)...")
+    url = URL_PRODUIT_LEGO.format(set_id)
+
+    driver_temporaire = driver is None
+    if driver_temporaire:
+        driver = creer_driver_metadonnees()
+    wait = WebDriverWait(driver, 10)
+
+    try:
+        planificateur.attendre_creneau(url, palier="navigateur")
+        driver.get(url)
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '[data-test="product-overview-name"]')))
+        return extraire_metadonnees_page(parser_page(driver.page_source), set_id)
     except Exception as e:
         logging.error(f"Erreur majeure lors de la récupération des métadonnées pour {set_id} : {e}")
         return None
     finally:
-        driver.quit()
+        if driver_temporaire:
+            navigateur.liberer_driver(driver)
+
+def get_lego_metadata(set_id, driver=None, session=None, fournir_driver=None):
+    """
+    Récupère les métadonnées d'un set : d'abord en HTTP simple, puis avec Selenium
+    uniquement si des champs manquent. Le driver peut être fourni directement,
+    ou créé à la demande par `fournir_driver` (pour ne lancer Chrome que si nécessaire).
+    """
+    logging.info(f"Récupération des métadonnées pour le set {set_id} sur Lego.com (HTTP d'abord)...")
+    metadata = get_lego_metadata_http(set_id, session=session)
+    manquants = champs_manquants(metadata)
+
+    if manquants:
+        logging.info(f"  -> Champs manquants en HTTP ({', '.join(manquants)}), passage par Selenium.")
+        if driver is None and fournir_driver is not None:
+            driver = fournir_driver()
+        metadata_selenium = get_lego_metadata_selenium(set_id, driver=driver)
+        if metadata_selenium:
+            # On garde ce que le HTTP avait trouvé si Selenium ne fait pas mieux
+            for champ in manquants:
+                if metadata and champ in champs_manquants(metadata_selenium):
+                    metadata_selenium[champ] = metadata[champ]
+            metadata = metadata_selenium
+
+    if not metadata:
+        return None
+    if metadata['nb_pieces'] == "N/A":
+        logging.warning(f"Impossible de trouver le nombre de pièces pour {set_id} avec toutes les méthodes.")
+    logging.info(f"Métadonnées récupérées : Nom='{metadata['nom']}', Pièces='{metadata['nb_pieces']}', Collection='{metadata['collection']}'")
+    return metadata
+
+def recuperer_metadonnees_sets(ids_sets, nb_navigateurs=NB_NAVIGATEURS_METADONNEES):
+    """
+    Récupère les métadonnées de plusieurs sets : une session HTTP partagée, et un petit groupe
+    de navigateurs créés seulement si besoin (chaque thread garde son driver pour tous ses sets).
+    Retourne un dictionnaire {set_id: metadata ou None}.
+    """
+    ids_sets = sorted(ids_sets)
+    if not ids_sets:
+        return {}
+
+    planificateur.configurer_domaine(URL_PRODUIT_LEGO.format(""), REQUETES_PAR_MINUTE_LEGO)
+    local = threading.local()
+    drivers = []
+    verrou = threading.Lock()
+    session = moteur_http.creer_session(HEADERS_HTTP, taille_pool=nb_navigateurs)
 
-def process_set_file(file_path):
+    def driver_du_thread():
+        # Chrome n'est lancé que si un set en a réellement besoin, puis gardé pour les suivants
+        # (et remplacé s'il a planté ; l'ancien est fermé avec les autres à la fin)
+        if not hasattr(local, 'driver') or not navigateur.est_vivant(local.driver):
+            local.driver = creer_driver_metadonnees()
+            with verrou:
+                drivers.append(local.driver)
+        return local.driver
+
+    def recuperer(set_id):
+        debut = time.perf_counter()
+        try:
+            metadata = get_lego_metadata(set_id, session=session, fournir_driver=driver_du_thread)
+        except Exception as e:
+            logging.error(f"Erreur lors de la récupération des métadonnées du set {set_id} : {e}")
+            metadata = None
+        logging.info(f"  -> Set {set_id} traité en {time.perf_counter() - debut:.1f}s")
+        return set_id, metadata
+
+    debut = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=min(nb_navigateurs, len(ids_sets))) as executor:
+            resultats = dict(executor.map(recuperer, ids_sets))
+    finally:
+        session.close()
+        for driver in drivers:
+            navigateur.liberer_driver(driver)
+    logging.info(f"Métadonnées de {len(ids_sets)} set(s) récupérées en {time.perf_counter() - debut:.1f}s avec {len(drivers)} navigateur(s).")
+    return resultats
+
+def process_set_file(file_path, driver=None):
     """Traite un fichier .txt pour ajouter/mettre à jour un set dans la configuration."""
     set_id = os.path.splitext(os.path.basename(file_path))[0]
     logging.info(f"--- Traitement du fichier pour le nouveau set ID: {set_id} ---")
@@ -114,8 +315,8 @@ def process_set_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
         urls = [line.strip() for line in f if line.strip()]
     
-    # Scraper les métadonnées depuis Lego.com
-    metadata = get_lego_metadata(set_id)
+    # Scraper les métadonnées depuis Lego.com (en réutilisant le driver fourni s'il y en a un)
+    metadata = get_lego_metadata(set_id, driver=driver)
     if not metadata:
         logging.error(f"Arrêt du traitement pour {set_id} car les métadonnées n'ont pas pu être récupérées.")
         return
@@ -146,6 +347,7 @@ def process_set_file(file_path):
     return nouvelle_ligne
 
 def main():
+    """Synchronise config_sets.xlsx avec la liste des sets et les fichiers de commande. Retourne la configuration à jour."""
     logging.info("Lancement du générateur de configuration...")
     config_changed = False
 
@@ -173,20 +375,16 @@ def main():
         df_config = df_config[~df_config['ID_Set'].isin(ids_a_supprimer)]
         config_changed = True
         # Nettoyer l'historique
-        try:
-            df_historique = pd.read_excel(FICHIER_HISTORIQUE, dtype=str)
-            df_historique_nettoye = df_historique[~df_historique['ID_Set'].isin(ids_a_supprimer)]
-            df_historique_nettoye.to_excel(FICHIER_HISTORIQUE, index=False)
-            logging.info(f"Historique des prix nettoyé pour les sets supprimés.")
-        except FileNotFoundError: pass
+        historique_prix.supprimer_sets(ids_a_supprimer)
+        logging.info(f"Historique des prix nettoyé pour les sets supprimés.")
 
     # Sets à ajouter
     ids_a_ajouter = ids_desires - ids_actuels
     if ids_a_ajouter:
         logging.info(f"Ajout de nouveaux sets depuis la liste : {ids_a_ajouter}")
         nouvelles_lignes = []
-        for set_id in ids_a_ajouter:
-            metadata = get_lego_metadata(set_id)
+        metadonnees_par_set = recuperer_metadonnees_sets(ids_a_ajouter)
+        for set_id, metadata in metadonnees_par_set.items():
             if metadata:
                 nouvelle_ligne = {
                     "ID_Set": set_id, "Nom_Set": metadata['nom'], "nbPieces": metadata['nb_pieces'],
@@ -217,13 +415,8 @@ def main():
                 logging.info(f"Set {set_id} supprimé via fichier de commande.")
                 config_changed = True
 
-                try:
-                    df_historique = pd.read_excel("prix_lego.xlsx", dtype=str)
-                    df_historique_nettoye = df_historique[df_historique['ID_Set'] != set_id]
-                    df_historique_nettoye.to_excel("prix_lego.xlsx", index=False)
-                    logging.info(f"Historique des prix pour le set {set_id} nettoyé.")
-                except FileNotFoundError:
-                    pass
+                historique_prix.supprimer_sets([set_id])
+                logging.info(f"Historique des prix pour le set {set_id} nettoyé.")
             else:
                 logging.warning(f"Le set {set_id} à supprimer n'a pas été trouvé.")
         else:
@@ -255,7 +448,8 @@ def main():
         logging.info(f"Fichier '{FICHIER_CONFIG_EXCEL}' mis à jour.")
     else:
         logging.info("Aucun changement de configuration nécessaire.")
+    return df_config
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-    main()
\ No newline at end of file
+    import pipeline
+    pipeline.main(["config"])
\ No newline at end of file
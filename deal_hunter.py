@@ -1,33 +1,33 @@
 # Fichier : deal_hunter.py
-import requests
-from bs4 import BeautifulSoup
+import html
+import re
+from urllib.parse import urljoin
+from scrapers import moteur_http, planificateur, cache_http
+from scrapers.analyse_html import parser_page
 import logging
-import json
 import os
 import smtplib
 from dotenv import load_dotenv
+import memoire_deals
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
 # --- CONFIGURATION ---
 URL_BONS_PLANS = "https://www.avenuedelabrique.com/promotions-et-bons-plans-lego"
-FICHIER_MEMOIRE = "deals_vus.json"
 URL_BASE_AVENUE = "https://www.avenuedelabrique.com"
-
-def charger_deals_vus():
-    """Charge la liste des ID de deals déjà vus depuis le fichier JSON."""
-    if not os.path.exists(FICHIER_MEMOIRE):
-        return set()
-    try:
-        with open(FICHIER_MEMOIRE, 'r', encoding='utf-8') as f:
-            return set(json.load(f))
-    except (json.JSONDecodeError, FileNotFoundError):
-        return set()
-
-def sauvegarder_deals_vus(deals_ids):
-    """Sauvegarde la liste mise à jour des ID de deals."""
-    with open(FICHIER_MEMOIRE, 'w', encoding='utf-8') as f:
-        json.dump(list(deals_ids), f, indent=4)
+REQUETES_PAR_MINUTE_AVENUE = 20 # Même rythme que avenue_scraper.py
+HEADERS_HTTP = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36',
+    'Accept-Language': 'fr-FR,fr;q=0.9'
+}
+TIMEOUT_HTTP = 15
+# Pages téléchargées en même temps (le rythme par site reste fixé par le planificateur)
+CONCURRENCE_DEALS = int(os.getenv('CONCURRENCE_DEALS', 4))
+# Nombre maximum de pages lues par source (page 1 comprise), en suivant sa pagination
+NB_PAGES_MAX = int(os.getenv('NB_PAGES_BONS_PLANS', 5))
+# Liens de pagination : ?page=N ou /page/N
+REGEX_PAGINATION = re.compile(r'href="([^"]*?(?:[?&]page=|/page/)\d+[^"]*)"')
+REGEX_NUMERO_PAGE = re.compile(r'([?&]page=|/page/)(\d+)')
 
 def envoyer_email_alerte_deals(nouveaux_deals, email_config):
     """Envoie un email récapitulatif avec une belle mise en page HTML pour les nouveaux deals."""
@@ -88,6 +88,154 @@ def envoyer_email_alerte_deals(nouveaux_deals, email_config):
     except Exception as e:
         logging.error(f"Erreur lors de l'envoi de l'email de bons plans : {e}")
 
+# --- RÉCOLTE DES DEALS ---
+def extraire_promotions(soup, url_page):
+    """Promotions générales (bloc div.pns) : une offre par marchand, avec sa date de fin."""
+    deals = []
+    for offre in soup.select('div.pns a.pn'):
+        try:
+            href = offre.get('href')
+
+            # On récupère la date de fin
+            date_fin_elem = offre.select_one('.pn-dat')
+            date_fin_texte = date_fin_elem.text.replace("Offre valable jusqu'au", "").strip() if date_fin_elem else "sans-date"
+
+            marchand = offre.select_one('.pn-btn strong').text.strip()
+            titre = offre.select_one('.pn-lib').text.replace(marchand, '', 1).strip()
+            details = offre.select_one('.pn-txt').text.strip()
+        except AttributeError as e:
+            logging.warning(f"Promotion mal formée ignorée sur {url_page} : {e}")
+            continue
+        # ID composite : l'offre et sa date de fin (voir memoire_deals)
+        deals.append((f"{href}_{date_fin_texte}", {
+            "marchand": marchand,
+            "titre": titre,
+            "details": f"{details} (Valable jusqu'au {date_fin_texte})",
+            "url": urljoin(url_page, href)
+        }))
+    return deals
+
+def extraire_sets_en_promo(soup, url_page):
+    """Sets en forte promotion (bloc div.prods) : l'URL du set sert d'ID."""
+    deals = []
+    for set_promo in soup.select('div.prods a.prodl'):
+        try:
+            href = set_promo.get('href')
+            titre = set_promo.select_one('.prodl-libelle').text.strip()
+            ref = set_promo.select_one('.prodl-ref').text.strip()
+            prix = set_promo.select_one('.prodl-prix span').text.strip()
+            reduc = set_promo.select_one('.prodl-reduc').text.strip()
+        except AttributeError as e:
+            logging.warning(f"Set en promotion mal formé ignoré sur {url_page} : {e}")
+            continue
+        deals.append((href, {
+            "marchand": "Divers (voir offre)",
+            "titre": f"SET PROMO ({reduc}) : {titre} ({ref})",
+            "details": f"Disponible à partir de {prix}",
+            "url": urljoin(url_page, href)
+        }))
+    return deals
+
+# Sections lisibles dans une page : bloc HTML à garder au parsing et fonction d'extraction
+SECTIONS_DEALS = {
+    "promotions": {"selecteur": "div.pns", "extraire": extraire_promotions},
+    "sets": {"selecteur": "div.prods", "extraire": extraire_sets_en_promo},
+}
+# Sources de deals : page de départ (les pages suivantes sont trouvées dans sa pagination) et sections à y lire.
+# Une source sur un autre site est téléchargée en parallèle des autres et ne rallonge presque pas la récolte.
+SOURCES_DEALS = [
+    {"url": URL_BONS_PLANS, "sections": ["promotions", "sets"]},
+]
+
+def urls_pages_suivantes(contenu, url_page, nb_pages_max=NB_PAGES_MAX):
+    """
+    URL des pages 2 à N d'une liste paginée, d'après les liens de pagination de sa première page.
+    Les pages intermédiaires absentes de la pagination affichée ("1 2 3 ... 9") sont reconstruites.
+    """
+    texte = contenu.decode('utf-8', errors='ignore') if isinstance(contenu, bytes) else contenu
+    prefixe = url_page.split('?')[0]
+    url_par_numero = {}
+    for href in REGEX_PAGINATION.findall(texte):
+        url = urljoin(url_page, html.unescape(href))
+        if url.startswith(prefixe):
+            url_par_numero[int(REGEX_NUMERO_PAGE.search(url).group(2))] = url
+    if not url_par_numero:
+        return []
+
+    derniere_page = min(max(url_par_numero), nb_pages_max)
+    modele = url_par_numero[max(url_par_numero)]
+    return [url_par_numero.get(numero) or REGEX_NUMERO_PAGE.sub(lambda m: f"{m.group(1)}{numero}", modele, count=1)
+            for numero in range(2, derniere_page + 1)]
+
+def telecharger_page(session, url):
+    """GET conditionnel (ETag / Last-Modified) : sur un 304, le corps mis en cache est réutilisé."""
+    entree_cache = cache_http.charger_entree(url)
+    en_tetes = cache_http.en_tetes_conditionnels(entree_cache)
+    reponse = planificateur.requete_get(session, url, headers=en_tetes, timeout=TIMEOUT_HTTP)
+    if reponse.status_code == 304 and entree_cache:
+        corps = cache_http.lire_corps(url)
+        if corps is not None:
+            cache_http.marquer_hit(url, entree_cache)
+            return corps
+        reponse = planificateur.requete_get(session, url, timeout=TIMEOUT_HTTP) # Corps perdu : on le redemande
+    reponse.raise_for_status()
+    cache_http.enregistrer(url, reponse, None)
+    return reponse.content
+
+def traiter_page(session, tache):
+    """Télécharge et analyse une page. Retourne (contenu, [(deal_id, deal), ...]) ou None en cas d'échec."""
+    url = tache['url']
+    try:
+        contenu = telecharger_page(session, url)
+        sections = [SECTIONS_DEALS[nom] for nom in tache['sections']]
+        soup = parser_page(contenu, [section['selecteur'] for section in sections])
+        deals = [deal for section in sections for deal in section['extraire'](soup, url)]
+        logging.info(f"  -> {len(deals)} offre(s) lue(s) sur {url}")
+        return contenu, deals
+    except Exception as e:
+        logging.error(f"Erreur lors de la récupération de la page de bons plans {url} : {e}")
+        return None
+
+def recolter_deals(sources=SOURCES_DEALS):
+    """
+    Récolte toutes les offres des sources, dédoublonnées par ID et dans l'ordre des pages.
+    Deux vagues de téléchargements parallèles (session partagée) : la première page de chaque source,
+    puis toutes les pages suivantes trouvées dans leur pagination.
+    Retourne {deal_id: deal}, ou None si aucune page n'a pu être lue.
+    """
+    planificateur.configurer_domaine(URL_BASE_AVENUE, REQUETES_PAR_MINUTE_AVENUE)
+    session = moteur_http.creer_session(HEADERS_HTTP, taille_pool=CONCURRENCE_DEALS)
+
+    def vague(taches):
+        return moteur_http.executer_en_parallele(
+            taches, lambda tache: traiter_page(session, tache),
+            concurrence_globale=CONCURRENCE_DEALS, concurrence_par_domaine=CONCURRENCE_DEALS
+        )
+
+    try:
+        premieres_pages = [{'url': source['url'], 'sections': source['sections']} for source in sources]
+        resultats = vague(premieres_pages)
+        pages_suivantes = [
+            {'url': url, 'sections': tache['sections']}
+            for tache, resultat in zip(premieres_pages, resultats) if resultat
+            for url in urls_pages_suivantes(resultat[0], tache['url'])
+        ]
+        if pages_suivantes:
+            logging.info(f"{len(pages_suivantes)} page(s) suivante(s) à lire dans la pagination.")
+            resultats += vague(pages_suivantes)
+    finally:
+        session.close()
+    cache_http.journaliser_statistiques()
+
+    resultats = [resultat for resultat in resultats if resultat]
+    if not resultats:
+        return None
+    deals = {}
+    for _, deals_de_la_page in resultats:
+        for deal_id, deal in deals_de_la_page:
+            deals.setdefault(deal_id, deal)
+    return deals
+
 def main():
     logging.info("Lancement du chasseur de bons plans...")
 
@@ -99,83 +247,36 @@ def main():
     }
     config_email_complete = all(EMAIL_CONFIG.values())
     
-    deals_vus = charger_deals_vus()
-    nouveaux_deals = []
-    
-    try:
-        response = requests.get(URL_BONS_PLANS, headers={'User-Agent': 'Mozilla/5.0'})
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # --- 1. Scraper les Promotions Générales ---
-        offres_generales = soup.select('div.pns a.pn')
-        logging.info(f"Analyse de {len(offres_generales)} promotions générales...")
-        for offre in offres_generales:
-            href = offre.get('href')
-
-            # On récupère la date de fin
-            date_fin_elem = offre.select_one('.pn-dat')
-            date_fin_texte = date_fin_elem.text.replace("Offre valable jusqu'au", "").strip() if date_fin_elem else "sans-date"
-            
-            # On crée l'ID composite
-            deal_id = f"{href}_{date_fin_texte}"
-          
-            if deal_id not in deals_vus:
-                marchand = offre.select_one('.pn-btn strong').text.strip()
-                titre = offre.select_one('.pn-lib').text.replace(marchand, '', 1).strip()
-                details = offre.select_one('.pn-txt').text.strip()
-                url = f"{URL_BASE_AVENUE}{href}"
-                
-                nouveaux_deals.append({
-                    "marchand": marchand,
-                    "titre": titre,
-                    "details": f"{details} (Valable jusqu'au {date_fin_texte})",
-                    "url": url
-                })
-                deals_vus.add(deal_id)
-                logging.info(f"  -> NOUVEAU DEAL GÉNÉRAL TROUVÉ : {marchand} - {titre} (ID: {deal_id})")
-
-        # --- 2. Scraper les Sets en Forte Promotion ---
-        '''
-        sets_en_promo = soup.select('div.prods a.prodl')
-        logging.info(f"Analyse de {len(sets_en_promo)} sets en promotion...")
-        for set_promo in sets_en_promo:
-            href = set_promo.get('href')
-            deal_id = href # Pour les sets individuels, l'URL est un bon ID unique
-            
-            if deal_id not in deals_vus:
-                titre = set_promo.select_one('.prodl-libelle').text.strip()
-                ref = set_promo.select_one('.prodl-ref').text.strip()
-                prix = set_promo.select_one('.prodl-prix span').text.strip()
-                reduc = set_promo.select_one('.prodl-reduc').text.strip()
-                url = href
-                
-                nouveaux_deals.append({
-                    "marchand": "Divers (voir offre)",
-                    "titre": f"SET PROMO ({reduc}) : {titre} ({ref})",
-                    "details": f"Disponible à partir de {prix}",
-                    "url": url
-                })
-                deals_vus.add(deal_id)
-                logging.info(f"  -> NOUVEAU SET EN PROMO TROUVÉ : {titre} ({ref})")
-        '''
+    # Deals déjà vus, sans ceux dont l'offre est terminée (voir memoire_deals)
+    deals_vus, memoire_a_reecrire = memoire_deals.charger()
 
-    except Exception as e:
-        logging.error(f"Erreur lors du scraping de la page des bons plans : {e}")
+    deals = recolter_deals()
+    if deals is None:
+        logging.error("Aucune page de bons plans n'a pu être lue.")
         return
+    logging.info(f"{len(deals)} offre(s) distincte(s) récoltée(s).")
+
+    nouveaux_deals = []
+    for deal_id, deal in deals.items():
+        if deal_id not in deals_vus:
+            nouveaux_deals.append(deal)
+            logging.info(f"  -> NOUVEAU DEAL TROUVÉ : {deal['marchand']} - {deal['titre']} (ID: {deal_id})")
+        # Aussi pour les deals connus : l'expiration des offres sans date de fin est repoussée
+        if memoire_deals.memoriser(deals_vus, deal_id):
+            memoire_a_reecrire = True
 
-    # --- 3. Envoyer les notifications et sauvegarder ---
+    # --- Envoyer les notifications et sauvegarder ---
     if nouveaux_deals:
         if config_email_complete:
             logging.info(f"{len(nouveaux_deals)} nouvelles promotions à notifier.")
             envoyer_email_alerte_deals(nouveaux_deals, EMAIL_CONFIG)
         else:
             logging.warning("Aucun email envoyé pour les deals car la configuration est incomplète.")
-        sauvegarder_deals_vus(deals_vus)
     else:
         logging.info("Aucune nouvelle promotion détectée.")
+    if memoire_a_reecrire:
+        memoire_deals.sauvegarder(deals_vus)
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-    logging.warning("Configuration email incomplète. Le script s'exécutera sans envoyer de notifications.")
-    main()
\ No newline at end of file
+    import pipeline
+    pipeline.main(["deals"])
\ No newline at end of file
@@ -1,13 +1,14 @@
+import hashlib
+import json
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
-import git
 from datetime import datetime
 import re
 import logging
-from matplotlib.dates import DateFormatter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from config_shared import PRIX_MOYEN_PAR_COLLECTION, SEUIL_BONNE_AFFAIRE, SEUIL_TRES_BONNE_AFFAIRE
+import historique_prix
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,11 +16,18 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# matplotlib et GitPython ne sont importés que lorsqu'un graphique est à dessiner ou que le dépôt wiki est utilisé
+
 # --- CONFIGURATION ---
-FICHIER_PRIX = "prix_lego.xlsx"
-FICHIER_CONFIG = "config_sets.xlsx"
 WIKI_REPO_URL = os.getenv("WIKI_URL", "https://github.com/Aktawind/lego-price-tracker.wiki.git")
 WIKI_LOCAL_PATH = "lego_wiki"
+# Empreintes des données de chaque set, conservées dans le dépôt wiki pour la génération incrémentale
+FICHIER_EMPREINTES = ".empreintes_wiki.json"
+VERSION_GENERATEUR = 2 # À incrémenter quand la mise en forme des pages ou des graphiques change (tout est alors régénéré)
+# Nombre de processus qui dessinent les graphiques en parallèle (1 = dans le processus principal)
+NB_PROCESSUS_GRAPHIQUES = int(os.getenv("NB_PROCESSUS_GRAPHIQUES", os.cpu_count() or 1))
+# Au-delà de ce nombre de jours, la courbe d'un site est simplifiée (et dessinée sans marqueurs)
+MAX_POINTS_PAR_SITE = 150
 
 # --- Nettoyage du dossier wiki ---
 def nettoyer_dossier_wiki(chemin_dossier):
@@ -37,9 +45,44 @@ def nettoyer_dossier_wiki(chemin_dossier):
             if fichier.startswith("graph_") and fichier.endswith(".png"):
                 os.remove(os.path.join(dossier_images, fichier))
 
+# --- Génération incrémentale ---
+def calculer_empreinte(*elements):
+    """Empreinte SHA-1 d'un ensemble de DataFrames et de valeurs simples (dict, str...)."""
+    h = hashlib.sha1(str(VERSION_GENERATEUR).encode())
+    for element in elements:
+        if isinstance(element, pd.DataFrame):
+            h.update(",".join(map(str, element.columns)).encode())
+            h.update(pd.util.hash_pandas_object(element, index=False).values.tobytes())
+        else:
+            h.update(json.dumps(element, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+def charger_empreintes():
+    """Retourne les empreintes du dernier passage ({id_set: {...}}), ou None si elles sont absentes."""
+    try:
+        with open(os.path.join(WIKI_LOCAL_PATH, FICHIER_EMPREINTES), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def sauvegarder_empreintes(empreintes):
+    with open(os.path.join(WIKI_LOCAL_PATH, FICHIER_EMPREINTES), 'w', encoding='utf-8') as f:
+        json.dump(empreintes, f, indent=2, sort_keys=True)
+
+def supprimer_fichiers_set(id_set, nom_fichier_page):
+    """Supprime la page et le graphique d'un set retiré du suivi."""
+    chemins = [os.path.join(WIKI_LOCAL_PATH, "images", f"graph_{id_set}.png")]
+    if nom_fichier_page:
+        chemins.append(os.path.join(WIKI_LOCAL_PATH, nom_fichier_page))
+    for chemin in chemins:
+        if os.path.exists(chemin):
+            os.remove(chemin)
+            logging.info(f"Fichier supprimé (set retiré) : {chemin}")
+
 # --- Préparation du chemin local pour le dépôt wiki ---
 def preparer_repo_wiki():
     """Clone le repo du wiki s'il n'existe pas, ou le met à jour."""
+    import git
     if os.path.exists(WIKI_LOCAL_PATH):
         logging.info("Mise à jour du dépôt wiki local...")
         repo = git.Repo(WIKI_LOCAL_PATH)
@@ -52,160 +95,300 @@ def preparer_repo_wiki():
     os.makedirs(os.path.join(WIKI_LOCAL_PATH, "images"), exist_ok=True)
 
 # --- GÉNÉRATION DES GRAPHIQUES ---
+def _pyplot():
+    """pyplot avec le backend Agg (rendu sans affichage, utilisable dans les processus du pool)."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def points_de_changement(prix):
+    """
+    Indices à garder pour une courbe de prix en paliers : les extrémités et, autour de chaque changement,
+    le dernier jour de l'ancien prix et le premier jour du nouveau. La courbe tracée est identique.
+    """
+    if len(prix) <= 2:
+        return np.arange(len(prix))
+    differe_du_precedent = np.r_[True, prix[1:] != prix[:-1]]
+    differe_du_suivant = np.r_[prix[:-1] != prix[1:], True]
+    return np.flatnonzero(differe_du_precedent | differe_du_suivant)
+
+def lttb(x, y, nb_points):
+    """Largest-Triangle-Three-Buckets : réduit une série à nb_points en gardant sa forme visuelle."""
+    n = len(x)
+    if nb_points >= n or nb_points < 3:
+        return np.arange(n)
+    indices = [0]
+    taille_seau = (n - 2) / (nb_points - 2)
+    a = 0
+    for i in range(nb_points - 2):
+        debut, fin = int(i * taille_seau) + 1, int((i + 1) * taille_seau) + 1
+        # Moyenne du seau suivant (ou dernier point), sommet du triangle
+        debut_suivant, fin_suivant = fin, min(int((i + 2) * taille_seau) + 1, n)
+        x_moyen, y_moyen = x[debut_suivant:fin_suivant].mean(), y[debut_suivant:fin_suivant].mean()
+        aires = np.abs((x[a] - x_moyen) * (y[debut:fin] - y[a]) - (x[a] - x[debut:fin]) * (y_moyen - y[a]))
+        a = debut + int(np.argmax(aires))
+        indices.append(a)
+    indices.append(n - 1)
+    return np.array(indices)
+
+def reduire_serie(points, nb_max=MAX_POINTS_PAR_SITE):
+    """Simplifie une série (index = dates, valeurs = prix) : points de changement, puis LTTB si c'est encore trop long."""
+    if len(points) <= nb_max:
+        return points
+    points = points.iloc[points_de_changement(points.values)]
+    if len(points) > nb_max:
+        from matplotlib.dates import date2num
+        points = points.iloc[lttb(date2num(points.index), points.values.astype(float), nb_max)]
+    return points
+
 def generer_graphique(df_set_history, id_set):
-    """Génère et sauvegarde un graphique d'évolution des prix pour un set."""
+    """
+    Génère et sauvegarde un graphique d'évolution des prix pour un set.
+    Matplotlib seul (pas de seaborn), avec le même rendu : une courbe par site, dans l'ordre d'apparition,
+    et la moyenne du jour si un site a été relevé plusieurs fois le même jour.
+    Les longs historiques sont simplifiés : le temps de rendu ne dépend plus de leur durée.
+    """
+    plt = _pyplot()
+    from matplotlib.dates import AutoDateLocator, DateFormatter
     plt.style.use('seaborn-v0_8-whitegrid')
     fig, ax = plt.subplots(figsize=(10, 6))
 
-    # Utiliser Seaborn pour un joli graphique
-    sns.lineplot(data=df_set_history, x='Date', y='Prix', hue='Site', marker='o', ax=ax)
+    sites = df_set_history['Site'].unique()
+    # Au-delà des 10 couleurs du cycle par défaut, une palette plus large évite que deux sites partagent une couleur
+    couleurs = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    if len(sites) > len(couleurs):
+        couleurs = [plt.get_cmap('tab20')(i % 20) for i in range(len(sites))]
+    for site, couleur in zip(sites, couleurs):
+        points = df_set_history[df_set_history['Site'] == site].groupby('Date')['Prix'].mean()
+        # Un marqueur par relevé tant que l'historique est court, une simple courbe ensuite
+        marqueur = 'o' if len(points) <= MAX_POINTS_PAR_SITE else None
+        points = reduire_serie(points)
+        ax.plot(points.index, points.values, marker=marqueur, markeredgewidth=0.75, markeredgecolor='w', color=couleur, label=site)
+    ax.legend(title='Site')
 
-    unique_dates = df_set_history['Date'].unique()
-    ax.set_xticks(unique_dates)
-    date_format = DateFormatter("%d/%m/%Y")
-    ax.xaxis.set_major_formatter(date_format)
+    # Nombre de graduations limité, quelle que soit la période couverte
+    ax.xaxis.set_major_locator(AutoDateLocator(minticks=4, maxticks=12))
+    ax.xaxis.set_major_formatter(DateFormatter("%d/%m/%Y"))
 
     ax.set_title(f"Évolution du prix pour le set {id_set}", fontsize=16)
     ax.set_ylabel("Prix (€)")
     ax.set_xlabel("Date")
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    fig.tight_layout()
     
     chemin_image = os.path.join(WIKI_LOCAL_PATH, "images", f"graph_{id_set}.png")
-    plt.savefig(chemin_image, dpi=150)
+    fig.savefig(chemin_image, dpi=150)
     plt.close(fig) # Fermer la figure pour libérer la mémoire
     logging.info(f"Graphique généré : {chemin_image}")
     return f"images/graph_{id_set}.png"
 
+def generer_graphiques(graphiques_a_generer):
+    """Dessine les graphiques [(historique du set, id_set), ...], répartis sur NB_PROCESSUS_GRAPHIQUES processus."""
+    if not graphiques_a_generer:
+        return
+    if NB_PROCESSUS_GRAPHIQUES <= 1 or len(graphiques_a_generer) == 1:
+        for df_set_history, id_set in graphiques_a_generer:
+            generer_graphique(df_set_history, id_set)
+        return
+
+    logging.info(f"Génération de {len(graphiques_a_generer)} graphique(s) sur {NB_PROCESSUS_GRAPHIQUES} processus...")
+    with ProcessPoolExecutor(max_workers=NB_PROCESSUS_GRAPHIQUES) as executor:
+        futurs = [executor.submit(generer_graphique, df_set_history, id_set) for df_set_history, id_set in graphiques_a_generer]
+        for futur in futurs:
+            futur.result()
+
+# --- ANALYSE DES PRIX (tous les sets en une passe) ---
+def analyser_prix(df_config, df_derniers_prix):
+    """
+    Calcule d'un coup, pour tous les sets, tout ce que les pages affichent.
+    Retourne (analyse_sets, prix_actuels) :
+    - analyse_sets, indexé par ID_Set : prix juste et seuils, meilleur prix actuel et son site,
+      prix le plus bas jamais vu et indicateur de bonne affaire ;
+    - prix_actuels : une ligne par (set, site), triée par set puis par prix, avec le prix par pièce,
+      le verdict et l'URL saisie à la main dans la config pour ce site.
+    """
+    config = df_config.drop_duplicates('ID_Set').set_index('ID_Set')
+    collections = config['Collection'] if 'Collection' in config else pd.Series('default', index=config.index)
+    nb_pieces = pd.to_numeric(config['nbPieces'], errors='coerce') if 'nbPieces' in config else pd.Series(np.nan, index=config.index)
+
+    analyse_sets = pd.DataFrame({'Collection': collections, 'Nb_Pieces': nb_pieces}, index=config.index)
+    analyse_sets['Prix_Moyen_Collection'] = collections.map(PRIX_MOYEN_PAR_COLLECTION).fillna(PRIX_MOYEN_PAR_COLLECTION['default'])
+    analyse_sets['Prix_Juste'] = nb_pieces * analyse_sets['Prix_Moyen_Collection']
+    analyse_sets['Analyse'] = analyse_sets['Prix_Juste'] > 0
+    analyse_sets['Seuil_Bonne'] = analyse_sets['Prix_Juste'].where(analyse_sets['Analyse']) * SEUIL_BONNE_AFFAIRE
+    analyse_sets['Seuil_Tres_Bonne'] = analyse_sets['Prix_Juste'].where(analyse_sets['Analyse']) * SEUIL_TRES_BONNE_AFFAIRE
+
+    # Prix actuels triés une seule fois : la première ligne de chaque set est son meilleur prix
+    prix_actuels = df_derniers_prix.sort_values(['ID_Set', 'Prix'], kind='stable').reset_index(drop=True)
+    par_set = prix_actuels.groupby('ID_Set', sort=False)
+    meilleurs = par_set[['Prix', 'Site']].first()
+    analyse_sets['Meilleur_Prix'] = meilleurs['Prix']
+    analyse_sets['Site_Meilleur_Prix'] = meilleurs['Site']
+    analyse_sets['Prix_Plus_Bas'] = par_set['Prix_Min'].min()
+    analyse_sets['Indicateur_Deal'] = np.select(
+        [analyse_sets['Meilleur_Prix'] <= analyse_sets['Seuil_Tres_Bonne'], analyse_sets['Meilleur_Prix'] <= analyse_sets['Seuil_Bonne']],
+        ["🔥🔥", "✅✅"], default="")
+
+    # Verdict par site, à partir du prix par pièce
+    prix_actuels = prix_actuels.join(analyse_sets[['Nb_Pieces', 'Prix_Moyen_Collection', 'Analyse']], on='ID_Set')
+    prix_actuels['Analyse'] = prix_actuels['Analyse'].eq(True) # Sets absents de la config : pas d'analyse
+    prix_actuels['Prix_Par_Piece'] = prix_actuels['Prix'] / prix_actuels['Nb_Pieces']
+    rapport = prix_actuels['Prix_Par_Piece'] / prix_actuels['Prix_Moyen_Collection']
+    prix_actuels['Verdict'] = np.select(
+        [~prix_actuels['Analyse'], rapport <= SEUIL_TRES_BONNE_AFFAIRE, rapport <= SEUIL_BONNE_AFFAIRE, rapport <= 1],
+        ["-", "TRÈS Bonne Affaire 🔥🔥", "Bonne Affaire ✅✅", "Prix Juste ✅"], default="Élevé ❌")
+
+    # URL manuelle de la config (colonne URL_<site>, points remplacés par des tirets bas)
+    colonnes_url = [colonne for colonne in config.columns if str(colonne).startswith('URL_')]
+    urls = config[colonnes_url].stack().rename('URL_Manuelle')
+    urls = urls[urls.astype(str) != '']
+    urls.index.names = ['ID_Set', 'Colonne_URL']
+    prix_actuels['Colonne_URL'] = 'URL_' + prix_actuels['Site'].str.replace('.', '_', regex=False)
+    prix_actuels = prix_actuels.join(urls, on=['ID_Set', 'Colonne_URL'])
+
+    return analyse_sets, prix_actuels
+
 # --- GÉNÉRATION DES PAGES WIKI ---
-# REMPLACEZ VOTRE FONCTION generer_pages_wiki PAR CELLE-CI
+def formater_lignes_prix(prix_actuels):
+    """Lignes du tableau 'Prix Actuels par Site', mises en forme pour tous les sets en une passe."""
+    lignes = []
+    for site, url_manuelle, prix, prix_par_piece, analyse, verdict in zip(
+            prix_actuels['Site'], prix_actuels['URL_Manuelle'], prix_actuels['Prix'],
+            prix_actuels['Prix_Par_Piece'], prix_actuels['Analyse'], prix_actuels['Verdict']):
+        # Lien vers le site seulement si une URL a été saisie dans la config
+        site_md = f"[{site}]({url_manuelle})" if pd.notna(url_manuelle) else site
+        prix_par_piece_md = f"{prix_par_piece:.3f}€" if analyse else "-"
+        lignes.append(f"| {site_md} | **{prix:.2f}€** | {prix_par_piece_md} | {verdict} |")
+    return lignes
 
-# Dans generer_wiki.py
+def formater_page_set(nom_set, id_set, image_url, analyse, prix_du_set, chemin_graphique):
+    """Met en forme la page de détail d'un set à partir des valeurs déjà calculées par analyser_prix."""
+    page_detail_content = [f"# {nom_set} ({id_set})"]
+    if image_url: page_detail_content.append(f"<img src='{image_url}' alt='Image de {nom_set}' width='400'>\n")
 
-def generer_pages_wiki(df_config):
+    if analyse.Analyse:
+        page_detail_content.append("## Analyse du Prix")
+        page_detail_content.append(f"- **Collection :** {analyse.Collection}")
+        page_detail_content.append(f"- **Nombre de pièces :** {int(analyse.Nb_Pieces)}")
+        page_detail_content.append(f"- **Prix juste estimé :** {analyse.Prix_Juste:.2f}€ ({analyse.Prix_Moyen_Collection:.3f}€/pièce)")
+        page_detail_content.append(f"- **Seuil Bonne Affaire :** < {analyse.Seuil_Bonne:.2f}€")
+        page_detail_content.append(f"- **Seuil TRÈS Bonne Affaire :** < {analyse.Seuil_Tres_Bonne:.2f}€")
+        page_detail_content.append(f"- **Prix le plus bas enregistré :** {analyse.Prix_Plus_Bas:.2f}€\n")
+
+    page_detail_content.append("## Prix Actuels par Site")
+    page_detail_content.append("| Site | Prix Actuel | Prix par Pièce | Analyse |")
+    page_detail_content.append("|:---|:---:|:---:|:---:|")
+
+    page_detail_content.extend(prix_du_set['Ligne_Tableau'])
+
+    page_detail_content.append("\n## Évolution des prix")
+    page_detail_content.append(f"<img src='./{chemin_graphique}' alt='Graphique des prix' width='900'>\n")
+    return "\n".join(page_detail_content)
+
+def generer_pages_wiki(df_config, complet=False):
+    """
+    Génère la page d'accueil et une page (avec son graphique) par set.
+    Les analyses de tous les sets sont calculées en une passe (analyser_prix) et l'historique est découpé
+    par set en un seul groupby : la boucle sur les sets ne fait plus que de la mise en forme.
+    En mode incrémental (par défaut), seuls les pages et graphiques dont les données ont changé
+    depuis le dernier passage sont réécrits, et seuls les fichiers des sets retirés sont supprimés.
+    """
     logging.info("Début de la génération des pages du Wiki...")
     
-    try:
-        # On s'assure de lire la colonne URL comme du texte
-        df_prix = pd.read_excel(FICHIER_PRIX, dtype={'ID_Set': str, 'URL': str})
-        df_prix['Date'] = pd.to_datetime(df_prix['Date']).dt.normalize()
-    except FileNotFoundError as e:
-        logging.error(f"Erreur: Fichier d'historique '{FICHIER_PRIX}' manquant - {e}")
+    df_prix = historique_prix.charger_historique()
+    if df_prix.empty:
+        logging.error(f"Erreur: Historique des prix vide ou manquant ('{historique_prix.FICHIER_HISTORIQUE_DB}').")
         return
-    except KeyError:
-        # Gère le cas où l'ancien fichier Excel n'a pas encore la colonne URL
-        logging.warning("Colonne 'URL' non trouvée dans l'historique. Les liens ne seront pas générés pour cette passe.")
-        df_prix = pd.read_excel(FICHIER_PRIX, dtype={'ID_Set': str})
-        df_prix['Date'] = pd.to_datetime(df_prix['Date']).dt.normalize()
-        df_prix['URL'] = '' # On ajoute une colonne URL vide pour la compatibilité
+    df_prix['Date'] = pd.to_datetime(df_prix['Date']).dt.normalize()
+    # Seules les colonnes utiles au graphique sont gardées (et envoyées aux processus de dessin)
+    historiques_par_set = {id_set: groupe for id_set, groupe in df_prix[['ID_Set', 'Date', 'Site', 'Prix']].groupby('ID_Set', sort=False)}
+
+    # Les prix actuels et les records viennent de l'instantané (une ligne par set et par site)
+    analyse_sets, prix_actuels = analyser_prix(df_config, historique_prix.charger_derniers_prix())
+    prix_actuels['Ligne_Tableau'] = formater_lignes_prix(prix_actuels)
+    prix_actuels_par_set = {id_set: groupe for id_set, groupe in prix_actuels.groupby('ID_Set', sort=False)}
 
     preparer_repo_wiki()
-    nettoyer_dossier_wiki(WIKI_LOCAL_PATH)
+    empreintes_precedentes = None if complet else charger_empreintes()
+    if empreintes_precedentes is None:
+        # Premier passage (ou régénération forcée) : on repart d'un dossier propre
+        nettoyer_dossier_wiki(WIKI_LOCAL_PATH)
+        empreintes_precedentes = {}
+    empreintes = {}
+    graphiques_a_generer = []
+    nb_pages_inchangees = 0
+    nb_graphiques_inchanges = 0
 
     home_content = ["# Suivi des Prix LEGO", "Mis à jour le : " + datetime.now().strftime('%d/%m/%Y à %H:%M') + "\n",
                     "| Image | Set | Meilleur Prix Actuel |", "|:---:|:---|:---|"]
     
-    for index, config_set in df_config.iterrows():
+    for config_set in df_config.to_dict('records'):
         id_set = config_set['ID_Set']
         nom_set = config_set['Nom_Set']
         image_url = config_set.get('Image_URL', '')
-        nb_pieces = pd.to_numeric(config_set.get('nbPieces'), errors='coerce')
-        collection = config_set.get('Collection', 'default')
 
-        # On prend TOUT l'historique pour ce set, sans filtrer les sites
-        df_set_history = df_prix[df_prix['ID_Set'] == id_set].copy()
-        
-        if df_set_history.empty:
+        prix_du_set = prix_actuels_par_set.get(id_set)
+        if prix_du_set is None:
             logging.warning(f"Aucun historique de prix trouvé pour le set {id_set}. Il sera ignoré pour le wiki.")
             continue
-
-        dernier_scan = df_set_history.sort_values('Date').groupby('Site').last().reset_index()
-        dernier_scan_trie = dernier_scan.sort_values('Prix', ascending=True)
-
-        meilleur_prix_actuel = dernier_scan_trie['Prix'].min()
-        site_meilleur_prix = dernier_scan_trie.iloc[0]['Site']
-
-        # Calculs pour l'analyse de prix
-        prix_moyen_collection = PRIX_MOYEN_PAR_COLLECTION.get(collection, PRIX_MOYEN_PAR_COLLECTION['default'])
-        prix_juste = nb_pieces * prix_moyen_collection if pd.notna(nb_pieces) else None
-        seuil_bonne = prix_juste * SEUIL_BONNE_AFFAIRE if prix_juste else None
-        seuil_tres_bonne = prix_juste * SEUIL_TRES_BONNE_AFFAIRE if prix_juste else None
+        analyse = analyse_sets.loc[id_set]
+        if isinstance(analyse, pd.DataFrame):
+            analyse = analyse.iloc[0]
+        df_set_history = historiques_par_set.get(id_set, df_prix.iloc[0:0])[['Date', 'Site', 'Prix']]
         
         # Nettoyage pour éviter que les ":" cassent les liens Wiki
         nom_pour_url = nom_set.replace(':', '').replace(' ', '-')
         nom_fichier_page = f"{id_set}-{nom_pour_url}.md"
         lien_wiki = f"{id_set}-{nom_pour_url}"
 
-        # --- Page d'accueil ---
-        indicateur_deal = ""
-        if seuil_tres_bonne and meilleur_prix_actuel <= seuil_tres_bonne:
-            indicateur_deal = "🔥🔥"
-        elif seuil_bonne and meilleur_prix_actuel <= seuil_bonne:
-            indicateur_deal = "✅✅"
+        # Empreintes des données dont dépendent la page (config + prix actuels) et le graphique (historique)
+        precedent = empreintes_precedentes.get(id_set, {})
+        empreinte_page = calculer_empreinte(config_set, prix_du_set[['Site', 'Prix', 'Prix_Min']])
+        empreinte_graphique = calculer_empreinte(df_set_history)
+        empreintes[id_set] = {'page': nom_fichier_page, 'empreinte_page': empreinte_page, 'empreinte_graphique': empreinte_graphique}
+        if precedent.get('page') and precedent['page'] != nom_fichier_page:
+            # Le nom du set a changé : l'ancienne page est remplacée
+            supprimer_fichiers_set(id_set, precedent['page'])
+            precedent = {}
 
+        # --- Page d'accueil ---
         image_md = f"[<img src='{image_url}' width='100'>]({lien_wiki})" if image_url else ""
         set_md = f"**[{nom_set}]({lien_wiki})**<br>*{id_set}*"
-        prix_md = f"**{meilleur_prix_actuel:.2f}€** {indicateur_deal}<br>*sur {site_meilleur_prix}*"
+        prix_md = f"**{analyse.Meilleur_Prix:.2f}€** {analyse.Indicateur_Deal}<br>*sur {analyse.Site_Meilleur_Prix}*"
         home_content.append(f"| {image_md} | {set_md} | {prix_md} |")
 
         # --- Pages de détail ---
-        page_detail_content = [f"# {nom_set} ({id_set})"]
-        if image_url: page_detail_content.append(f"<img src='{image_url}' alt='Image de {nom_set}' width='400'>\n")
-        
-        if prix_juste:
-            prix_plus_bas_jamais_vu = df_set_history['Prix'].min()
-            page_detail_content.append("## Analyse du Prix")
-            page_detail_content.append(f"- **Collection :** {collection}")
-            page_detail_content.append(f"- **Nombre de pièces :** {int(nb_pieces)}")
-            page_detail_content.append(f"- **Prix juste estimé :** {prix_juste:.2f}€ ({prix_moyen_collection:.3f}€/pièce)")
-            page_detail_content.append(f"- **Seuil Bonne Affaire :** < {seuil_bonne:.2f}€")
-            page_detail_content.append(f"- **Seuil TRÈS Bonne Affaire :** < {seuil_tres_bonne:.2f}€")
-            page_detail_content.append(f"- **Prix le plus bas enregistré :** {prix_plus_bas_jamais_vu:.2f}€\n")
-
-        page_detail_content.append("## Prix Actuels par Site")
-        page_detail_content.append("| Site | Prix Actuel | Prix par Pièce | Analyse |")
-        page_detail_content.append("|:---|:---:|:---:|:---:|")
-
-        # On boucle sur le tableau trié des prix trouvés
-        for _, row in dernier_scan_trie.iterrows():
-            prix = row['Prix']
-            site = row['Site']
-            
-            # === LOGIQUE DE LIENS CONDITIONNELS ===
-            colonne_url_config = f"URL_{site.replace('.', '_')}"
-            url_manuelle = config_set.get(colonne_url_config)
-
-            if pd.notna(url_manuelle) and url_manuelle:
-                site_md = f"[{site}]({url_manuelle})"
-            else:
-                site_md = site
-            # ======================================
-            
-            analyse_emoji = "-"
-            if prix_juste:
-                ppp_actuel = prix / nb_pieces
-                if ppp_actuel <= prix_moyen_collection * SEUIL_TRES_BONNE_AFFAIRE: analyse_emoji = "TRÈS Bonne Affaire 🔥🔥"
-                elif ppp_actuel <= prix_moyen_collection * SEUIL_BONNE_AFFAIRE: analyse_emoji = "Bonne Affaire ✅✅"
-                elif ppp_actuel <= prix_moyen_collection: analyse_emoji = "Prix Juste ✅"
-                else: analyse_emoji = "Élevé ❌"
-                page_detail_content.append(f"| {site_md} | **{prix:.2f}€** | {ppp_actuel:.3f}€ | {analyse_emoji} |")
-            else:
-                page_detail_content.append(f"| {site_md} | **{prix:.2f}€** | - | {analyse_emoji} |")
-
-        chemin_graphique = generer_graphique(df_set_history, id_set)
-        page_detail_content.append("\n## Évolution des prix")
-        page_detail_content.append(f"<img src='./{chemin_graphique}' alt='Graphique des prix' width='900'>\n")
-        
+        chemin_graphique = f"images/graph_{id_set}.png"
+        if precedent.get('empreinte_graphique') == empreinte_graphique and os.path.exists(os.path.join(WIKI_LOCAL_PATH, chemin_graphique)):
+            nb_graphiques_inchanges += 1
+        else:
+            graphiques_a_generer.append((df_set_history, id_set))
+
+        if precedent.get('empreinte_page') == empreinte_page and os.path.exists(os.path.join(WIKI_LOCAL_PATH, nom_fichier_page)):
+            nb_pages_inchangees += 1
+            continue
+
         with open(os.path.join(WIKI_LOCAL_PATH, nom_fichier_page), 'w', encoding='utf-8') as f:
-            f.write("\n".join(page_detail_content))
+            f.write(formater_page_set(nom_set, id_set, image_url, analyse, prix_du_set, chemin_graphique))
         logging.info(f"Page de détail générée : {nom_fichier_page}")
 
+    generer_graphiques(graphiques_a_generer)
+
     with open(os.path.join(WIKI_LOCAL_PATH, "Home.md"), 'w', encoding='utf-8') as f:
         f.write("\n".join(home_content))
     logging.info("Page d'accueil 'Home.md' générée.")
 
+    # Seuls les sets qui ne sont plus suivis (ou n'ont plus de prix) perdent leurs fichiers
+    for id_set, precedent in empreintes_precedentes.items():
+        if id_set not in empreintes:
+            supprimer_fichiers_set(id_set, precedent.get('page', ''))
+    sauvegarder_empreintes(empreintes)
+    logging.info(f"Génération incrémentale : {len(empreintes) - nb_pages_inchangees} page(s) et {len(empreintes) - nb_graphiques_inchanges} graphique(s) régénérés sur {len(empreintes)} set(s).")
+
 # --- PUSH DES CHANGEMENTS VERS LE WIKI ---
 def pousser_changements_wiki():
+    import git
     try:
         repo = git.Repo(WIKI_LOCAL_PATH)
         if not repo.is_dirty(untracked_files=True):
@@ -232,7 +415,6 @@ def pousser_changements_wiki():
 
 # --- POINT D'ENTRÉE DU SCRIPT ---
 if __name__ == "__main__":
-    df_config = pd.read_excel(FICHIER_CONFIG, dtype={'ID_Set': str})
-    if not df_config.empty:
-        generer_pages_wiki(df_config) # On passe df_config en argument
-        pousser_changements_wiki()
\ No newline at end of file
+    import sys
+    import pipeline
+    pipeline.main(["wiki"] + sys.argv[1:]) # --complet est transmis au pipeline
\ No newline at end of file
@@ -0,0 +1,183 @@
+# Fichier : historique_prix.py
+import sqlite3
+import os
+import logging
+import pandas as pd
+
+# --- CONFIGURATION ---
+FICHIER_HISTORIQUE_DB = "prix_lego.db"
+FICHIER_HISTORIQUE_EXCEL = "prix_lego.xlsx" # Ancien format figé : migré puis retiré du dépôt par le workflow, sert encore à l'export
+COLONNES_HISTORIQUE = ['Date', 'ID_Set', 'Nom_Set', 'Site', 'Prix', 'URL']
+
+SCHEMA_HISTORIQUE = """
+CREATE TABLE IF NOT EXISTS historique (
+    Date TEXT NOT NULL,
+    ID_Set TEXT NOT NULL,
+    Nom_Set TEXT,
+    Site TEXT NOT NULL,
+    Prix REAL NOT NULL,
+    URL TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_historique_set_site_date ON historique (ID_Set, Site, Date);
+CREATE TABLE IF NOT EXISTS dernier_prix (
+    ID_Set TEXT NOT NULL,
+    Site TEXT NOT NULL,
+    Prix REAL NOT NULL,
+    Date TEXT NOT NULL,
+    Prix_Min REAL NOT NULL,
+    Date_Prix_Min TEXT NOT NULL,
+    PRIMARY KEY (ID_Set, Site)
+);
+"""
+
+# Mise à jour incrémentale de l'instantané : dans le SET, les noms de colonnes désignent l'ancienne ligne
+UPSERT_DERNIER_PRIX = """
+ON CONFLICT (ID_Set, Site) DO UPDATE SET
+    Prix = CASE WHEN excluded.Date >= Date THEN excluded.Prix ELSE Prix END,
+    Date = MAX(Date, excluded.Date),
+    Prix_Min = MIN(Prix_Min, excluded.Prix_Min),
+    Date_Prix_Min = CASE WHEN excluded.Prix_Min < Prix_Min THEN excluded.Date_Prix_Min ELSE Date_Prix_Min END
+"""
+
+def _connexion(fichier_db=FICHIER_HISTORIQUE_DB, migration_auto=True):
+    """
+    Ouvre la base d'historique et crée le schéma si besoin.
+    Au tout premier lancement, l'ancien fichier Excel est migré automatiquement
+    (sauf avec migration_auto=False, quand l'appelant importe lui-même un autre fichier).
+    """
+    premiere_creation = not os.path.exists(fichier_db)
+    conn = sqlite3.connect(fichier_db)
+    conn.executescript(SCHEMA_HISTORIQUE)
+    if migration_auto and premiere_creation and os.path.exists(FICHIER_HISTORIQUE_EXCEL):
+        _importer_excel(conn, FICHIER_HISTORIQUE_EXCEL, fichier_db)
+    # Base créée avant l'instantané des derniers prix : on le construit une fois depuis l'historique
+    instantane_vide = not conn.execute("SELECT EXISTS (SELECT 1 FROM dernier_prix)").fetchone()[0]
+    if instantane_vide and conn.execute("SELECT EXISTS (SELECT 1 FROM historique)").fetchone()[0]:
+        _reconstruire_derniers_prix(conn)
+    return conn
+
+def _normaliser(df):
+    """Met un DataFrame de prix au format de la table (colonnes, types, dates en texte)."""
+    df = df.reindex(columns=COLONNES_HISTORIQUE).copy()
+    df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    df['ID_Set'] = df['ID_Set'].astype(str)
+    df['Prix'] = pd.to_numeric(df['Prix'], errors='coerce')
+    df = df.dropna(subset=['Prix'])
+    return df.astype(object).where(df.notna(), None)
+
+def _inserer(conn, df):
+    """Ajoute des lignes normalisées à l'historique et met à jour l'instantané dans la même transaction."""
+    with conn:
+        conn.executemany("INSERT INTO historique VALUES (?, ?, ?, ?, ?, ?)", df.itertuples(index=False, name=None))
+        conn.executemany(
+            "INSERT INTO dernier_prix VALUES (?, ?, ?, ?, ?, ?)" + UPSERT_DERNIER_PRIX,
+            df[['ID_Set', 'Site', 'Prix', 'Date', 'Prix', 'Date']].itertuples(index=False, name=None)
+        )
+
+def _reconstruire_derniers_prix(conn):
+    """Recalcule entièrement l'instantané des derniers prix à partir de l'historique."""
+    logging.info("Construction de l'instantané des derniers prix depuis l'historique...")
+    with conn:
+        conn.execute("DELETE FROM dernier_prix")
+        conn.execute(
+            "INSERT INTO dernier_prix SELECT ID_Set, Site, Prix, Date, Prix, Date FROM historique WHERE true ORDER BY Date, rowid"
+            + UPSERT_DERNIER_PRIX
+        )
+
+def _importer_excel(conn, fichier_excel, fichier_db):
+    """Copie toutes les lignes d'un historique Excel dans la base ouverte sur fichier_db."""
+    logging.info(f"Migration de l'historique '{fichier_excel}' vers '{fichier_db}'...")
+    df = pd.read_excel(fichier_excel, dtype={'ID_Set': str, 'URL': str})
+    df = _normaliser(df)
+    _inserer(conn, df)
+    logging.info(f"Migration terminée : {len(df)} lignes importées.")
+    return len(df)
+
+def migrer_depuis_excel(fichier_excel=FICHIER_HISTORIQUE_EXCEL, fichier_db=FICHIER_HISTORIQUE_DB):
+    """
+    Migration en une fois de l'historique Excel vers la base SQLite.
+    Ne fait rien si la base contient déjà des données, pour ne jamais dupliquer l'historique.
+    """
+    conn = _connexion(fichier_db, migration_auto=False)
+    try:
+        deja_present = conn.execute("SELECT COUNT(*) FROM historique").fetchone()[0]
+        if deja_present:
+            logging.info(f"La base '{fichier_db}' contient déjà {deja_present} lignes. Migration ignorée.")
+            return 0
+        return _importer_excel(conn, fichier_excel, fichier_db)
+    finally:
+        conn.close()
+
+def charger_historique(fichier_db=FICHIER_HISTORIQUE_DB):
+    """Retourne tout l'historique des prix sous forme de DataFrame (ID_Set en texte)."""
+    conn = _connexion(fichier_db)
+    try:
+        df = pd.read_sql_query("SELECT * FROM historique ORDER BY Date", conn)
+    finally:
+        conn.close()
+    df['ID_Set'] = df['ID_Set'].astype(str)
+    df['URL'] = df['URL'].fillna('')
+    return df
+
+def charger_derniers_prix(fichier_db=FICHIER_HISTORIQUE_DB):
+    """
+    Retourne l'instantané des prix : une ligne par (ID_Set, Site) avec le dernier prix, sa date,
+    le prix le plus bas jamais vu et sa date. Sa taille dépend du nombre de sets, pas de l'historique.
+    """
+    conn = _connexion(fichier_db)
+    try:
+        df = pd.read_sql_query("SELECT * FROM dernier_prix", conn)
+    finally:
+        conn.close()
+    df['ID_Set'] = df['ID_Set'].astype(str)
+    return df
+
+def ajouter_prix(lignes, fichier_db=FICHIER_HISTORIQUE_DB):
+    """
+    Ajoute les nouvelles lignes de prix à la fin de l'historique, sans réécrire l'existant.
+    L'instantané des derniers prix est mis à jour dans la même transaction.
+    Accepte une liste de dictionnaires ou un DataFrame.
+    """
+    df = _normaliser(pd.DataFrame(lignes))
+    if df.empty:
+        return 0
+    conn = _connexion(fichier_db)
+    try:
+        _inserer(conn, df)
+    finally:
+        conn.close()
+    return len(df)
+
+def supprimer_sets(ids_sets, fichier_db=FICHIER_HISTORIQUE_DB):
+    """Supprime tout l'historique (et l'instantané) des sets donnés. Retourne le nombre de lignes supprimées."""
+    ids_sets = [str(set_id) for set_id in ids_sets]
+    if not ids_sets:
+        return 0
+    conn = _connexion(fichier_db)
+    try:
+        with conn:
+            placeholders = ", ".join("?" for _ in ids_sets)
+            curseur = conn.execute(f"DELETE FROM historique WHERE ID_Set IN ({placeholders})", ids_sets)
+            conn.execute(f"DELETE FROM dernier_prix WHERE ID_Set IN ({placeholders})", ids_sets)
+        return curseur.rowcount
+    finally:
+        conn.close()
+
+def exporter_excel(fichier_excel=FICHIER_HISTORIQUE_EXCEL, fichier_db=FICHIER_HISTORIQUE_DB):
+    """Export optionnel de tout l'historique vers un fichier Excel (lecture humaine uniquement)."""
+    df = charger_historique(fichier_db)
+    df.to_excel(fichier_excel, index=False)
+    logging.info(f"Historique exporté vers '{fichier_excel}' ({len(df)} lignes).")
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Gestion de l'historique des prix LEGO.")
+    parser.add_argument("action", choices=["migrer", "exporter"], help="'migrer' importe prix_lego.xlsx, 'exporter' écrit un Excel depuis la base.")
+    parser.add_argument("--fichier", default=FICHIER_HISTORIQUE_EXCEL, help="Fichier Excel source ou destination.")
+    args = parser.parse_args()
+
+    if args.action == "migrer":
+        migrer_depuis_excel(args.fichier)
+    else:
+        exporter_excel(args.fichier)
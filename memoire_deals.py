@@ -0,0 +1,92 @@
+# Fichier : memoire_deals.py
+# Mémoire des bons plans déjà vus (deals_vus.json), avec expiration.
+# Chaque ID de deal se termine par sa date de fin ("{href}_{jj/mm/aaaa}") : l'entrée est oubliée
+# quand l'offre est terminée depuis plus de MARGE_EXPIRATION_JOURS, et le fichier ne grossit plus indéfiniment.
+# Format : {id_deal: date d'expiration "AAAA-MM-JJ"}, trié par ID pour des diffs git d'une ligne par deal.
+import json
+import logging
+import os
+import re
+from datetime import date, timedelta
+
+# --- CONFIGURATION ---
+FICHIER_MEMOIRE = "deals_vus.json"
+# Délai de grâce après la date de fin : une offre encore affichée quelques jours de plus n'est pas re-signalée
+MARGE_EXPIRATION_JOURS = int(os.getenv("MARGE_EXPIRATION_DEALS", 7))
+# Deals sans date de fin lisible ("sans-date", promos de sets...) : oubliés au bout de ce délai après leur dernière apparition
+DUREE_SANS_DATE_JOURS = int(os.getenv("DUREE_DEALS_SANS_DATE", 90))
+
+_REGEX_DATE_FIN = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})\s*$')
+
+def date_fin(deal_id):
+    """Date de fin contenue à la fin de l'ID du deal (jj/mm/aaaa), ou None si elle est absente ou invalide."""
+    match = _REGEX_DATE_FIN.search(deal_id.rsplit('_', 1)[-1])
+    if not match:
+        return None
+    jour, mois, annee = map(int, match.groups())
+    try:
+        return date(annee, mois, jour)
+    except ValueError:
+        return None
+
+def date_expiration(deal_id, aujourd_hui=None):
+    """Date à partir de laquelle le deal peut être oublié."""
+    fin = date_fin(deal_id)
+    if fin is None:
+        return (aujourd_hui or date.today()) + timedelta(days=DUREE_SANS_DATE_JOURS)
+    return fin + timedelta(days=MARGE_EXPIRATION_JOURS)
+
+def memoriser(memoire, deal_id, aujourd_hui=None):
+    """
+    Ajoute un deal vu aujourd'hui à la mémoire. Retourne True si la mémoire a changé.
+    Un deal sans date de fin déjà connu voit son expiration repoussée tant qu'il est encore affiché
+    (fenêtre glissante), pour ne pas être oublié puis re-signalé s'il dure plus de DUREE_SANS_DATE_JOURS.
+    Pour limiter les réécritures du fichier, elle n'est repoussée qu'une fois la moitié du délai écoulée.
+    """
+    expiration = date_expiration(deal_id, aujourd_hui)
+    if deal_id not in memoire:
+        memoire[deal_id] = expiration.isoformat()
+        return True
+    if date_fin(deal_id) is None:
+        demi_delai = timedelta(days=DUREE_SANS_DATE_JOURS / 2)
+        if date.fromisoformat(memoire[deal_id]) < expiration - demi_delai:
+            memoire[deal_id] = expiration.isoformat()
+            return True
+    return False
+
+def charger(fichier=FICHIER_MEMOIRE, aujourd_hui=None):
+    """
+    Charge la mémoire des deals et oublie ceux qui ont expiré.
+    Accepte aussi l'ancien format (liste d'IDs), converti à la volée.
+    Retourne (memoire, a_reecrire) : a_reecrire est vrai si des deals ont été oubliés ou le format converti.
+    """
+    aujourd_hui = aujourd_hui or date.today()
+    try:
+        with open(fichier, 'r', encoding='utf-8') as f:
+            contenu = json.load(f)
+    except FileNotFoundError:
+        return {}, False
+    except json.JSONDecodeError as e:
+        logging.error(f"Mémoire des deals '{fichier}' illisible, elle repart de zéro : {e}")
+        return {}, True
+
+    if isinstance(contenu, list):
+        memoire = {}
+        for deal_id in contenu:
+            memoriser(memoire, deal_id, aujourd_hui)
+    else:
+        memoire = contenu
+
+    limite = aujourd_hui.isoformat() # Les dates ISO se comparent comme des chaînes
+    actifs = {deal_id: expiration for deal_id, expiration in memoire.items() if expiration > limite}
+    nb_oublies = len(memoire) - len(actifs)
+    if nb_oublies:
+        logging.info(f"{nb_oublies} deal(s) expiré(s) oublié(s), {len(actifs)} toujours en mémoire.")
+    return actifs, nb_oublies > 0 or isinstance(contenu, list)
+
+def sauvegarder(memoire, fichier=FICHIER_MEMOIRE):
+    """Écrit la mémoire des deals (écriture atomique, clés triées)."""
+    fichier_temporaire = fichier + ".tmp"
+    with open(fichier_temporaire, 'w', encoding='utf-8') as f:
+        json.dump(memoire, f, indent=2, sort_keys=True)
+    os.replace(fichier_temporaire, fichier)
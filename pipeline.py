@@ -0,0 +1,109 @@
+# Fichier : pipeline.py
+# Enchaîne les étapes du suivi des prix dans un seul processus :
+#   config -> avenue -> deals -> prix -> wiki
+# La configuration des sets et les deals d'Avenue de la Brique passent d'une étape à l'autre en mémoire,
+# et les navigateurs Chrome sont gardés ouverts d'une étape à la suivante (pool de scrapers.navigateur).
+# Les modules des étapes ne sont importés que si l'étape est lancée.
+#
+# Exemples :
+#   python pipeline.py                      (toutes les étapes)
+#   python pipeline.py config avenue prix   (seulement ces étapes, dans l'ordre du pipeline)
+#   python pipeline.py wiki --complet
+import argparse
+import logging
+
+# --- CONFIGURATION ---
+FICHIER_CONFIG_EXCEL = "config_sets.xlsx"
+ETAPES = ("config", "avenue", "deals", "prix", "wiki")
+ETAPES_NAVIGATEUR = {"config", "avenue", "prix"} # Étapes qui peuvent lancer Chrome
+
+# --- CONFIGURATION DES SETS PARTAGÉE ---
+def charger_config(fichier_config=FICHIER_CONFIG_EXCEL):
+    """Lit la configuration des sets (tout en texte, cases vides = ''), ou None si le fichier est illisible."""
+    import pandas as pd
+    try:
+        return pd.read_excel(fichier_config, dtype=str).fillna('')
+    except Exception as e:
+        logging.error(f"Erreur lors de la lecture de '{fichier_config}': {e}")
+        return None
+
+def config_du_contexte(contexte):
+    """Configuration déjà en mémoire (étape config ou lecture précédente), lue une seule fois sinon."""
+    if contexte.get('df_config') is None:
+        contexte['df_config'] = charger_config()
+    return contexte['df_config']
+
+# --- ÉTAPES ---
+def etape_config(contexte):
+    import config_generator
+    contexte['df_config'] = config_generator.main().fillna('')
+
+def etape_avenue(contexte):
+    import avenue_scraper
+    df_config = config_du_contexte(contexte)
+    if df_config is None: return
+    contexte['deals_avenue'] = avenue_scraper.main(df_config)
+
+def etape_deals(contexte):
+    import deal_hunter
+    deal_hunter.main()
+
+def etape_prix(contexte):
+    import catch_lego_price
+    if not all(catch_lego_price.EMAIL_CONFIG.values()):
+        logging.error("Variables d'environnement pour l'email non configurées. Vérification des prix annulée.")
+        return
+    df_config = config_du_contexte(contexte)
+    if df_config is None: return
+    catch_lego_price.verifier_les_prix(df_config, deals_avenue=contexte.get('deals_avenue'))
+
+def etape_wiki(contexte):
+    import generer_wiki
+    df_config = config_du_contexte(contexte)
+    if df_config is None or df_config.empty: return
+    generer_wiki.generer_pages_wiki(df_config, complet=contexte.get('complet', False))
+    generer_wiki.pousser_changements_wiki()
+
+FONCTIONS_ETAPES = {
+    "config": etape_config,
+    "avenue": etape_avenue,
+    "deals": etape_deals,
+    "prix": etape_prix,
+    "wiki": etape_wiki,
+}
+
+# --- EXÉCUTION ---
+def executer(etapes=ETAPES, complet=False):
+    """Lance les étapes demandées, toujours dans l'ordre du pipeline, en partageant un même contexte."""
+    etapes = [etape for etape in ETAPES if etape in etapes]
+    contexte = {'complet': complet}
+
+    pool_navigateurs = bool(ETAPES_NAVIGATEUR.intersection(etapes))
+    if pool_navigateurs:
+        from scrapers import navigateur
+        navigateur.demarrer_pool()
+    try:
+        for etape in etapes:
+            logging.info(f"=== Étape '{etape}' ===")
+            FONCTIONS_ETAPES[etape](contexte)
+    finally:
+        if pool_navigateurs:
+            navigateur.fermer_pool()
+    return contexte
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Suivi des prix LEGO : lance tout ou partie des étapes dans un seul processus.")
+    parser.add_argument("etapes", nargs="*", metavar="ETAPE",
+                        help=f"Étapes à lancer parmi {', '.join(ETAPES)} (par défaut : toutes).")
+    parser.add_argument("--complet", action="store_true", help="Wiki : tout régénérer au lieu de ne refaire que ce qui a changé.")
+    args = parser.parse_args(arguments)
+    # (pas de choices= : argparse refuse la liste vide d'un argument nargs="*")
+    inconnues = [etape for etape in args.etapes if etape not in ETAPES]
+    if inconnues:
+        parser.error(f"étape(s) inconnue(s) : {', '.join(inconnues)} (choisir parmi {', '.join(ETAPES)})")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    executer(args.etapes or ETAPES, complet=args.complet)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,25 @@
-from .standard_scraper import scrape as scrape_standard
-from .amazon_scraper import scrape as scrape_amazon
-from .carrefour_scraper import scrape as scrape_carrefour
\ No newline at end of file
+# Les scrapers sont chargés à la première utilisation (PEP 562) : "import scrapers" reste léger,
+# et un module n'est importé que si l'un de ses scrapers est réellement appelé
+import importlib
+
+_SCRAPERS = {
+    "scrape_standard": ("standard_scraper", "scrape"),
+    "scrape_standard_navigateur": ("standard_scraper", "scrape_navigateur"),
+    "scrape_amazon": ("amazon_scraper", "scrape"),
+    "scrape_amazon_http": ("amazon_scraper", "scrape_http"),
+    "scrape_carrefour": ("carrefour_scraper", "scrape"),
+    "scrape_carrefour_http": ("carrefour_scraper", "scrape_http"),
+}
+
+__all__ = list(_SCRAPERS)
+
+def __getattr__(nom):
+    if nom not in _SCRAPERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+    module, fonction = _SCRAPERS[nom]
+    scraper = getattr(importlib.import_module(f".{module}", __name__), fonction)
+    globals()[nom] = scraper # Les appels suivants ne repassent plus par __getattr__
+    return scraper
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
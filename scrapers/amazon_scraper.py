@@ -1,63 +1,212 @@
+import json
 import logging
+import os
 import re
+import threading
 import time
 import requests
-from bs4 import BeautifulSoup
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from . import planificateur, consentement, strategie
+from .analyse_html import parser_page
 
-# --- FONCTION UTILITAIRE SPÉCIFIQUE À AMAZON ---
+# --- CONFIGURATION ---
+URL_ACCUEIL_AMAZON = "https://www.amazon.fr/"
+CODE_POSTAL_LIVRAISON = "38540"
+FICHIER_COOKIES_AMAZON = "cookies_amazon.json"
+# Durée pendant laquelle les cookies de localisation sauvegardés sont réutilisés avant de refaire la procédure
+DUREE_VIE_COOKIES = int(os.environ.get("DUREE_VIE_COOKIES_AMAZON", 7 * 24 * 3600))
+CHAMPS_COOKIE = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'expiry')
+
+_verrou = threading.Lock()
+_localisation_ip = {}
+
+# --- FONCTIONS UTILITAIRES SPÉCIFIQUES À AMAZON ---
 def obtenir_localisation_ip():
+    """
+    Interroge ipinfo.io pour connaître le code pays de l'IP actuelle (ex: 'FR', 'US').
+    Le résultat (ou l'échec, None) est mémorisé : un seul appel par lancement, quel que soit le nombre de navigateurs.
+    """
+    with _verrou:
+        if 'pays' not in _localisation_ip:
+            try:
+                logging.info("Récupération de la localisation de l'IP...")
+                reponse = requests.get("https://ipinfo.io/json", timeout=5)
+                reponse.raise_for_status()
+                _localisation_ip['pays'] = reponse.json().get('country', 'N/A')
+                logging.info(f"Localisation détectée : Pays={_localisation_ip['pays']}")
+            except Exception as e:
+                logging.error(f"Impossible de récupérer la localisation de l'IP: {e}")
+                _localisation_ip['pays'] = None
+        return _localisation_ip['pays']
+
+def sauvegarder_cookies(driver):
+    """Enregistre sur disque les cookies Amazon du navigateur (dont l'adresse de livraison)."""
+    cookies = [{champ: cookie[champ] for champ in CHAMPS_COOKIE if champ in cookie} for cookie in driver.get_cookies()]
+    fichier_temporaire = FICHIER_COOKIES_AMAZON + ".tmp"
+    with _verrou:
+        with open(fichier_temporaire, 'w', encoding='utf-8') as f:
+            json.dump({'sauvegarde': time.time(), 'cookies': cookies}, f)
+        os.replace(fichier_temporaire, FICHIER_COOKIES_AMAZON)
+    logging.info(f"  -> {len(cookies)} cookie(s) Amazon sauvegardé(s) dans {FICHIER_COOKIES_AMAZON}.")
+
+def charger_cookies():
+    """Retourne les cookies Amazon sauvegardés encore valides (moins de DUREE_VIE_COOKIES), ou une liste vide."""
+    try:
+        with open(FICHIER_COOKIES_AMAZON, 'r', encoding='utf-8') as f:
+            sauvegarde = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+    maintenant = time.time()
+    if maintenant - sauvegarde.get('sauvegarde', 0) > DUREE_VIE_COOKIES:
+        logging.info("  -> Cookies Amazon sauvegardés expirés, la localisation va être refaite.")
+        return []
+    return [cookie for cookie in sauvegarde.get('cookies', []) if cookie.get('expiry', maintenant + 1) > maintenant]
+
+def injecter_cookies(driver):
+    """
+    Recharge dans le navigateur les cookies Amazon sauvegardés encore valides.
+    Retourne True si des cookies ont été injectés (le navigateur est alors sur la page d'accueil d'Amazon).
+    """
+    cookies = charger_cookies()
+    if not cookies:
+        return False
+
+    # Selenium n'accepte que les cookies du domaine de la page courante
+    planificateur.attendre_creneau(URL_ACCUEIL_AMAZON, palier="navigateur")
+    driver.get(URL_ACCUEIL_AMAZON)
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            logging.debug(f"Cookie Amazon '{cookie.get('name')}' refusé : {e}")
+    planificateur.attendre_creneau(URL_ACCUEIL_AMAZON, palier="navigateur")
+    driver.get(URL_ACCUEIL_AMAZON)
+    return True
+
+def localisation_active(driver):
+    """Vérifie sur la page courante que l'adresse de livraison affichée est bien la nôtre."""
+    from selenium.webdriver.common.by import By
+    elements = driver.find_elements(By.ID, "glow-ingress-line2")
+    return bool(elements) and CODE_POSTAL_LIVRAISON in elements[0].text
+
+def forcer_localisation(driver):
+    """
+    Saisit le code postal de livraison français sur Amazon (bannière de cookies, popover, code postal).
+    Retourne False si la procédure a échoué.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    try:
+        planificateur.attendre_creneau(URL_ACCUEIL_AMAZON, palier="navigateur")
+        driver.get(URL_ACCUEIL_AMAZON)
+        wait = WebDriverWait(driver, 10)
+
+        # 1. On gère les cookies sur la page d'accueil AVANT tout le reste
+        consentement.accepter_banniere(driver, (By.ID, "sp-cc-accept"))
+
+        # 2. Le bouton de localisation change d'ID selon les versions de la page
+        xpath_localisation = "//*[@id='nav-global-location-popover-link' or @id='glow-ingress-block']"
+        wait.until(EC.element_to_be_clickable((By.XPATH, xpath_localisation))).click()
+
+        # 3. Saisie du code postal
+        champ_postal = wait.until(EC.visibility_of_element_located((By.ID, "GLUXZipUpdateInput")))
+        champ_postal.clear()
+        champ_postal.send_keys(CODE_POSTAL_LIVRAISON)
+        wait.until(EC.element_to_be_clickable((By.ID, "GLUXZipUpdate"))).click()
+
+        # 4. On attend que l'adresse affichée soit mise à jour
+        wait.until(EC.text_to_be_present_in_element((By.ID, "glow-ingress-line2"), CODE_POSTAL_LIVRAISON))
+        logging.info("Localisation française pour Amazon forcée avec succès.")
+        return True
+    except Exception as e:
+        logging.error(f"La procédure de forçage de localisation pour Amazon a échoué : {e}")
+        return False
+
+def preparer_session(driver):
+    """
+    Garantit une adresse de livraison française dans le navigateur quand l'IP n'est pas française.
+    Les cookies sauvegardés sont essayés d'abord ; la procédure complète n'est refaite (puis sauvegardée)
+    que s'ils manquent, ont expiré ou ne suffisent plus. Retourne False si la localisation n'a pas pu être forcée.
+    """
+    pays_actuel = obtenir_localisation_ip()
+    if not pays_actuel or pays_actuel == 'FR':
+        logging.info("IP française (ou non détectée), pas de forçage de localisation nécessaire pour Amazon.")
+        return True
+
+    logging.info(f"IP non-française ({pays_actuel}) détectée. Préparation de la localisation pour Amazon...")
+    if injecter_cookies(driver) and localisation_active(driver):
+        logging.info("Localisation française pour Amazon restaurée depuis les cookies sauvegardés.")
+        return True
+
+    if not forcer_localisation(driver):
+        return False
+    try:
+        sauvegarder_cookies(driver)
+    except Exception as e:
+        logging.warning(f"Impossible de sauvegarder les cookies Amazon : {e}")
+    return True
+
+def extraire_prix(contenu):
+    """Extrait le prix d'une page produit Amazon (prix complet, sinon parties entière et décimale)."""
+    soup = parser_page(contenu, ["span.a-offscreen", "span.a-price-whole", "span.a-price-fraction"])
+
+    element_prix = soup.select_one("span.a-offscreen")
+    if element_prix:
+        match = re.search(r'(\d+[.,]\d{1,2})', element_prix.get_text())
+        if match:
+            return float(match.group(1).replace(',', '.'))
+
+    partie_entiere_elem = soup.select_one("span.a-price-whole")
+    partie_fraction_elem = soup.select_one("span.a-price-fraction")
+    if partie_entiere_elem and partie_fraction_elem:
+        partie_entiere_propre = "".join(filter(str.isdigit, partie_entiere_elem.get_text()))
+        prix_complet_str = f"{partie_entiere_propre}.{partie_fraction_elem.get_text(strip=True)}"
+        return float(prix_complet_str)
+
+    return None
+
+def scrape_http(url, headers, session=None):
+    """
+    Palier HTTP : lit le prix sans navigateur.
+    Hors de France, on n'y va qu'avec les cookies de localisation sauvegardés, sinon le prix affiché
+    ne serait pas celui d'une livraison en France : on laisse alors la main au navigateur.
+    """
     try:
-        logging.info("Récupération de la localisation de l'IP...")
-        reponse = requests.get("https://ipinfo.io/json", timeout=5)
+        cookies = {}
+        pays_actuel = obtenir_localisation_ip()
+        if pays_actuel and pays_actuel != 'FR':
+            cookies = {cookie['name']: cookie['value'] for cookie in charger_cookies()}
+            if not cookies:
+                logging.info(f"  -> Pas de cookies de localisation Amazon valides, passage au navigateur pour {url}")
+                return None
+
+        client = session if session is not None else requests
+        reponse = planificateur.requete_get(client, url, tentatives_max=1, headers=headers, cookies=cookies, timeout=10)
+        if strategie.est_un_mur(reponse):
+            logging.warning(f"  -> Page de blocage Amazon (HTTP {reponse.status_code}) pour {url}")
+            return None
         reponse.raise_for_status()
-        data = reponse.json()
-        pays = data.get('country', 'N/A')
-        logging.info(f"Localisation détectée : Pays={pays}")
-        return pays
+        return extraire_prix(reponse.content)
+
     except Exception as e:
-        logging.error(f"Impossible de récupérer la localisation de l'IP: {e}")
+        logging.error(f"Erreur lors de la récupération HTTP de l'URL Amazon {url}: {e}")
         return None
 
 def scrape(driver, url):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
     wait = WebDriverWait(driver, 10)
     
     try:
         # === ÉTAPE 1 : PRÉPARATION DE LA SESSION (si c'est la première visite) ===
         # On vérifie si la localisation a déjà été faite en regardant l'URL actuelle
         if "amazon.fr" not in driver.current_url:
-            pays_actuel = obtenir_localisation_ip()
-            if pays_actuel and pays_actuel != 'FR':
-                logging.info(f"IP non-française ({pays_actuel}) détectée. Forçage de la localisation pour Amazon...")
-                try:
-                    driver.get("https://www.amazon.fr/")
-                    
-                    # 1a. Gérer les cookies EN PREMIER
-                    try:
-                        bouton_cookies = wait.until(EC.element_to_be_clickable((By.ID, "sp-cc-accept")))
-                        logging.info("  -> Bannière de cookies trouvée sur la page d'accueil. Clic...")
-                        bouton_cookies.click()
-                    except Exception:
-                        pass # Si pas de cookies, on continue
-
-                    # 1b. Gérer la localisation
-                    bouton_localisation = wait.until(EC.element_to_be_clickable((By.ID, "nav-global-location-popover-link")))
-                    bouton_localisation.click()
-                    champ_postal = wait.until(EC.visibility_of_element_located((By.ID, "GLUXZipUpdateInput")))
-                    champ_postal.send_keys("38540")
-                    bouton_actualiser = driver.find_element(By.CSS_SELECTOR, '[data-action="GLUXPostalUpdateAction"] input')
-                    bouton_actualiser.click()
-                    wait.until(EC.staleness_of(bouton_actualiser))
-                    logging.info("Localisation française pour Amazon forcée avec succès.")
-                    
-                except Exception as e:
-                    logging.warning(f"La procédure de forçage de localisation pour Amazon a échoué : {e}")
-            else:
-                logging.info("IP française (ou non détectée), pas de forçage de localisation nécessaire.")
+            preparer_session(driver)
         
         # === ÉTAPE 2 : SCRAPING DE LA PAGE PRODUIT ===
+        planificateur.attendre_creneau(url, palier="navigateur")
         driver.get(url)
 
         # On gère les popups qui peuvent apparaître sur la page produit elle-même
@@ -71,22 +220,7 @@ def scrape(driver, url):
 
         # Récupérer le prix
         wait.until(EC.visibility_of_element_located((By.ID, "corePrice_feature_div")))
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        element_prix = soup.select_one("span.a-offscreen")
-        if element_prix:
-            match = re.search(r'(\d+[.,]\d{1,2})', element_prix.get_text())
-            if match:
-                return float(match.group(1).replace(',', '.'))
-        
-        partie_entiere_elem = soup.select_one("span.a-price-whole")
-        partie_fraction_elem = soup.select_one("span.a-price-fraction")
-        if partie_entiere_elem and partie_fraction_elem:
-            partie_entiere_propre = "".join(filter(str.isdigit, partie_entiere_elem.get_text()))
-            prix_complet_str = f"{partie_entiere_propre}.{partie_fraction_elem.get_text(strip=True)}"
-            return float(prix_complet_str)
-            
-        return None
+        return extraire_prix(driver.page_source)
 
     except Exception as e:
         logging.error(f"Erreur lors du scraping de l'URL Amazon {url}: {e}")
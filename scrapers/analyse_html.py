@@ -0,0 +1,86 @@
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml est nettement plus rapide que le parseur intégré ; on garde html.parser si lxml n'est pas installé
+try:
+    import lxml  # noqa: F401
+    PARSEUR_HTML = 'lxml'
+except ImportError:
+    PARSEUR_HTML = 'html.parser'
+
+_REGEX_MAILLON = re.compile(r'([a-zA-Z][\w-]*)?((?:\.[\w-]+|#[\w-]+|\[[\w-]+(?:=(?:"[^"]*"|\'[^\']*\'|[\w-]+))?\])*)')
+_REGEX_CONDITION = re.compile(r'\.([\w-]+)|#([\w-]+)|\[([\w-]+)(?:=["\']?([^"\'\]]*)["\']?)?\]')
+
+def _premier_maillon(selecteur):
+    """
+    Réduit le premier maillon d'un sélecteur CSS simple à (balise, attribut, valeur).
+    Ex: '.egToM .visually-hidden' -> (None, 'class', 'egToM'). Retourne None si le sélecteur est trop complexe.
+    """
+    selecteur = selecteur.strip()
+    if not selecteur or ',' in selecteur:
+        return None
+    match = _REGEX_MAILLON.fullmatch(selecteur.split()[0])
+    if not match:
+        return None
+    balise, reste = match.group(1), match.group(2)
+    conditions = _REGEX_CONDITION.findall(reste)
+    # On garde la condition la plus sélective : id, puis classe, puis autre attribut
+    for classe, identifiant, attribut, valeur in conditions:
+        if identifiant:
+            return balise, 'id', identifiant
+    for classe, identifiant, attribut, valeur in conditions:
+        if classe:
+            return balise, 'class', classe
+    for classe, identifiant, attribut, valeur in conditions:
+        if attribut:
+            return balise, attribut, valeur or True
+    return (balise, None, None) if balise else None
+
+def _strainer(maillons):
+    """Construit un SoupStrainer unique qui garde les éléments (et leur contenu) correspondant à l'un des maillons."""
+    balises = {maillon[0] for maillon in maillons}
+    attributs = {maillon[1] for maillon in maillons}
+    if len(attributs) != 1:
+        return None
+    balise = balises.pop() if len(balises) == 1 else None
+    attribut = attributs.pop()
+    valeurs = {maillon[2] for maillon in maillons}
+
+    if attribut is None:
+        return SoupStrainer(balise) if balise else None
+    if attribut == 'class':
+        # bs4 4.13 compare la valeur brute de l'attribut : on découpe nous-mêmes les classes multiples
+        filtre = lambda valeur: valeur is not None and bool(valeurs & set(valeur if isinstance(valeur, list) else valeur.split()))
+    elif True in valeurs:
+        filtre = lambda valeur: valeur is not None
+    else:
+        filtre = lambda valeur: valeur in valeurs
+    return SoupStrainer(balise, attrs={attribut: filtre})
+
+def parser_page(contenu, selecteurs=None):
+    """
+    Parse une page HTML avec le parseur le plus rapide disponible.
+    Si des sélecteurs CSS sont fournis, seuls les sous-arbres utiles sont construits (SoupStrainer),
+    et la page n'est même pas parsée si aucun de leurs marqueurs n'apparaît dans le texte brut.
+    Les sélecteurs restent ensuite utilisables tels quels avec select_one() sur la soupe retournée.
+    """
+    if not selecteurs:
+        return BeautifulSoup(contenu, PARSEUR_HTML)
+    if isinstance(selecteurs, str):
+        selecteurs = [selecteurs]
+
+    maillons = [_premier_maillon(selecteur) for selecteur in selecteurs]
+    if None in maillons:
+        return BeautifulSoup(contenu, PARSEUR_HTML)
+
+    # Pré-scan : si aucun marqueur (classe, id, valeur d'attribut) n'est présent, inutile de parser
+    marqueurs = [maillon[2] for maillon in maillons if isinstance(maillon[2], str) and maillon[2]]
+    if marqueurs and len(marqueurs) == len(maillons):
+        texte = contenu if isinstance(contenu, str) else contenu.decode('utf-8', errors='ignore')
+        if not any(marqueur in texte for marqueur in marqueurs):
+            return BeautifulSoup("", PARSEUR_HTML)
+
+    strainer = _strainer(maillons)
+    if strainer is None:
+        return BeautifulSoup(contenu, PARSEUR_HTML)
+    return BeautifulSoup(contenu, PARSEUR_HTML, parse_only=strainer)
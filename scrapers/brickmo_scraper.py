@@ -1,17 +1,19 @@
 import logging
-from bs4 import BeautifulSoup
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
+from . import planificateur
+from .analyse_html import parser_page
 
 def scrape(driver, url):
     """Scrape le prix d'un produit sur Brickmo.com."""
     wait = WebDriverWait(driver, 10)
     try:
+        planificateur.attendre_creneau(url, palier="navigateur")
         driver.get(url)
         wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'meta[itemprop="price"]')))
         
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        soup = parser_page(driver.page_source, 'meta[itemprop="price"]')
         meta_tag = soup.find('meta', itemprop='price')
         if meta_tag and meta_tag.has_attr('content'):
             return float(meta_tag['content'])
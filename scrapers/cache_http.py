@@ -0,0 +1,154 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+# --- CONFIGURATION ---
+REPERTOIRE_CACHE = "cache_http"
+TAILLE_MAX_CACHE = 50 * 1024 * 1024 # 50 Mo, au-delà les pages les moins récemment utilisées sont supprimées
+
+_verrou = threading.Lock()
+_compteurs = {'hits': 0, 'misses': 0, 'evictions': 0}
+# Index des entrées sur disque, lu une fois par processus : {chemin_meta: [dernier_acces, taille]}
+_index = None
+_taille_totale = 0
+
+def _chemins(url):
+    """Retourne les chemins (métadonnées, corps) de l'entrée de cache d'une URL."""
+    cle = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    base = os.path.join(REPERTOIRE_CACHE, cle)
+    return base + ".json", base + ".html"
+
+def charger_entree(url):
+    """Retourne l'entrée de cache d'une URL (validateurs, dernier prix...) ou None."""
+    chemin_meta, _ = _chemins(url)
+    try:
+        with open(chemin_meta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def lire_corps(url):
+    """Retourne le corps HTML mis en cache pour une URL, ou None."""
+    _, chemin_corps = _chemins(url)
+    try:
+        with open(chemin_corps, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def en_tetes_conditionnels(entree):
+    """Construit les en-têtes If-None-Match / If-Modified-Since à partir d'une entrée de cache."""
+    en_tetes = {}
+    if entree and entree.get('etag'):
+        en_tetes['If-None-Match'] = entree['etag']
+    if entree and entree.get('last_modified'):
+        en_tetes['If-Modified-Since'] = entree['last_modified']
+    return en_tetes
+
+def enregistrer(url, reponse, prix):
+    """
+    Mémorise le corps, les validateurs et le prix extrait d'une réponse 200.
+    Les réponses sans ETag ni Last-Modified ne peuvent pas être revalidées : elles ne sont pas gardées.
+    """
+    with _verrou:
+        _compteurs['misses'] += 1
+    etag = reponse.headers.get('ETag')
+    last_modified = reponse.headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return
+
+    chemin_meta, chemin_corps = _chemins(url)
+    entree = {'url': url, 'etag': etag, 'last_modified': last_modified, 'prix': prix, 'dernier_acces': time.time()}
+    with _verrou:
+        os.makedirs(REPERTOIRE_CACHE, exist_ok=True)
+        with open(chemin_corps, 'wb') as f:
+            f.write(reponse.content)
+        with open(chemin_meta, 'w', encoding='utf-8') as f:
+            json.dump(entree, f)
+        _indexer(chemin_meta, chemin_corps, entree['dernier_acces'])
+        if _taille_totale > TAILLE_MAX_CACHE:
+            _evincer()
+
+def marquer_hit(url, entree, prix=None):
+    """Enregistre la réutilisation d'une entrée après un 304 (et met à jour son prix s'il a été recalculé)."""
+    chemin_meta, _ = _chemins(url)
+    entree['dernier_acces'] = time.time()
+    if prix is not None:
+        entree['prix'] = prix
+    with _verrou:
+        _compteurs['hits'] += 1
+        try:
+            with open(chemin_meta, 'w', encoding='utf-8') as f:
+                json.dump(entree, f)
+            _indexer(chemin_meta, chemin_meta[:-len(".json")] + ".html", entree['dernier_acces'])
+        except OSError as e:
+            logging.warning(f"Impossible de mettre à jour le cache pour {url}: {e}")
+
+def _taille_entree(chemin_meta, chemin_corps):
+    return os.path.getsize(chemin_meta) + (os.path.getsize(chemin_corps) if os.path.exists(chemin_corps) else 0)
+
+def _charger_index():
+    """Construit l'index à partir des fichiers du cache (une seule lecture complète par processus). Appelé sous verrou."""
+    global _index, _taille_totale
+    _index = {}
+    _taille_totale = 0
+    if not os.path.isdir(REPERTOIRE_CACHE):
+        return
+    for fichier in os.listdir(REPERTOIRE_CACHE):
+        if not fichier.endswith(".json"):
+            continue
+        chemin_meta = os.path.join(REPERTOIRE_CACHE, fichier)
+        chemin_corps = chemin_meta[:-len(".json")] + ".html"
+        try:
+            with open(chemin_meta, 'r', encoding='utf-8') as f:
+                dernier_acces = json.load(f).get('dernier_acces', 0)
+            taille = _taille_entree(chemin_meta, chemin_corps)
+        except (OSError, json.JSONDecodeError):
+            continue
+        _index[chemin_meta] = [dernier_acces, taille]
+        _taille_totale += taille
+
+def _indexer(chemin_meta, chemin_corps, dernier_acces):
+    """Met à jour l'index et la taille totale après l'écriture d'une entrée. Appelé sous verrou."""
+    global _taille_totale
+    if _index is None:
+        _charger_index() # L'entrée qui vient d'être écrite est déjà comptée par la lecture du répertoire
+    try:
+        taille = _taille_entree(chemin_meta, chemin_corps)
+    except OSError:
+        return
+    ancienne = _index.get(chemin_meta)
+    _taille_totale += taille - (ancienne[1] if ancienne else 0)
+    _index[chemin_meta] = [dernier_acces, taille]
+
+def _evincer():
+    """
+    Supprime les entrées les moins récemment utilisées tant que le cache dépasse sa taille maximale.
+    Ne travaille que sur l'index en mémoire (aucune lecture des métadonnées). Appelé sous verrou.
+    """
+    global _taille_totale
+    for dernier_acces, chemin_meta in sorted((valeur[0], chemin) for chemin, valeur in _index.items()):
+        if _taille_totale <= TAILLE_MAX_CACHE:
+            break
+        chemin_corps = chemin_meta[:-len(".json")] + ".html"
+        for chemin in (chemin_meta, chemin_corps):
+            if os.path.exists(chemin):
+                os.remove(chemin)
+        _taille_totale -= _index.pop(chemin_meta)[1]
+        _compteurs['evictions'] += 1
+
+def statistiques():
+    """Retourne une copie des compteurs du cache pour ce lancement."""
+    with _verrou:
+        return dict(_compteurs)
+
+def journaliser_statistiques():
+    """Écrit dans le journal le bilan du cache HTTP pour ce lancement."""
+    stats = statistiques()
+    total = stats['hits'] + stats['misses']
+    if not total:
+        return
+    logging.info(f"Cache HTTP : {stats['hits']} hit(s) (304), {stats['misses']} miss, {stats['evictions']} éviction(s) - taux de hit {stats['hits'] / total:.0%}.")
@@ -1,44 +1,61 @@
 import logging
 import time
-from bs4 import BeautifulSoup
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import requests
+from . import planificateur, consentement, strategie
+from .analyse_html import parser_page
+
+XPATH_COOKIES = (
+    "//button[contains(text(), 'Tout accepter')]"
+    " | //button[contains(text(), 'Accepter & Fermer')]"
+    " | //a[contains(text(), 'Continuer sans accepter')]"
+    " | //button[@id='onetrust-accept-btn-handler']"
+)
+
+def extraire_prix(contenu, euros, centimes):
+    """Reconstitue le prix à partir des éléments 'euros' et 'centimes' affichés séparément."""
+    soup = parser_page(contenu, [euros, centimes])
+    partie_entiere_elem = soup.select_one(euros)
+    partie_fraction_elem = soup.select_one(centimes)
+
+    if partie_entiere_elem and partie_fraction_elem:
+        partie_entiere = partie_entiere_elem.get_text(strip=True).replace(',', '')
+        partie_fraction = partie_fraction_elem.get_text(strip=True).replace(',', '')
+        prix_complet_str = f"{partie_entiere}.{partie_fraction}"
+        return float(prix_complet_str)
+    return None
+
+def scrape_http(url, headers, euros, centimes, session=None):
+    """Palier HTTP : lit le prix éclaté sans navigateur, si le site ne renvoie pas de page de blocage."""
+    try:
+        client = session if session is not None else requests
+        reponse = planificateur.requete_get(client, url, tentatives_max=1, headers=headers, timeout=10)
+        if strategie.est_un_mur(reponse):
+            logging.warning(f"  -> Page de blocage (HTTP {reponse.status_code}) pour {url}")
+            return None
+        reponse.raise_for_status()
+        return extraire_prix(reponse.content, euros, centimes)
+    except Exception as e:
+        logging.error(f"Erreur lors de la récupération HTTP (prix éclaté) de {url}: {e}")
+        return None
 
 def scrape(driver, url, euros, centimes):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
     logging.info(f"  -> Scraping (prix éclaté) de {url}")
     wait = WebDriverWait(driver, 10)
     
     try:
+        planificateur.attendre_creneau(url, palier="navigateur")
         driver.get(url)
         
-        try:
-            xpath_cookies = (
-                "//button[contains(text(), 'Tout accepter')]"
-                " | //button[contains(text(), 'Accepter & Fermer')]"
-                " | //a[contains(text(), 'Continuer sans accepter')]"
-                " | //button[@id='onetrust-accept-btn-handler']"
-            )
-            bouton_cookies = wait.until(EC.element_to_be_clickable((By.XPATH, xpath_cookies)))
-            logging.info(f"  -> Bannière de cookies trouvée. Clic sur '{bouton_cookies.text}'...")
-            bouton_cookies.click()
-            wait.until(EC.invisibility_of_element(bouton_cookies))
-        except Exception:
-            logging.info("  -> Pas de bannière de cookies gérée visible.")
+        # La bannière n'est attendue qu'une fois par session (ou plus du tout si le consentement a été restauré)
+        consentement.accepter_banniere(driver, (By.XPATH, XPATH_COOKIES))
         
         wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, euros)))
         wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, centimes)))
         
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        partie_entiere_elem = soup.select_one(euros)
-        partie_fraction_elem = soup.select_one(centimes)
-        
-        if partie_entiere_elem and partie_fraction_elem:
-            partie_entiere = partie_entiere_elem.get_text(strip=True).replace(',', '')
-            partie_fraction = partie_fraction_elem.get_text(strip=True).replace(',', '')
-            prix_complet_str = f"{partie_entiere}.{partie_fraction}"
-            return float(prix_complet_str)
-        return None
+        return extraire_prix(driver.page_source, euros, centimes)
 
     except Exception as e:
         logging.error(f"Erreur lors du scraping (prix éclaté) de {url}: {e}")
@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from .moteur_http import domaine
+
+# --- CONFIGURATION ---
+FICHIER_CONSENTEMENTS = "consentements.json"
+# Les cookies de consentement sauvegardés sont réutilisés pendant cette durée, puis la bannière est de nouveau gérée
+DUREE_VIE_CONSENTEMENT = int(os.environ.get("DUREE_VIE_CONSENTEMENT", 30 * 24 * 3600))
+
+_verrou = threading.Lock()
+# Domaines dont la bannière est déjà réglée, par navigateur (oubliés quand le navigateur disparaît)
+_domaines_regles = weakref.WeakKeyDictionary()
+
+def _charger():
+    try:
+        with open(FICHIER_CONSENTEMENTS, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _domaines(driver):
+    """Ensemble des domaines déjà réglés pour ce navigateur. Appelé sous verrou."""
+    return _domaines_regles.setdefault(driver, set())
+
+def injecter_cookies(driver):
+    """
+    À appeler juste après la création d'un navigateur, avant la première navigation :
+    recharge via le protocole DevTools les cookies de consentement encore valides de chaque domaine.
+    Les bannières de ces domaines ne seront alors plus attendues.
+    """
+    maintenant = time.time()
+    with _verrou:
+        consentements = _charger()
+        domaines = _domaines(driver)
+    for hote, sauvegarde in consentements.items():
+        if maintenant - sauvegarde.get('sauvegarde', 0) > DUREE_VIE_CONSENTEMENT:
+            continue
+        cookies = [cookie for cookie in sauvegarde.get('cookies', []) if cookie.get('expiry', 0) > maintenant]
+        try:
+            for cookie in cookies:
+                driver.execute_cdp_cmd('Network.setCookie', {
+                    'name': cookie['name'], 'value': cookie['value'],
+                    'domain': cookie.get('domain', hote), 'path': cookie.get('path', '/'),
+                    'secure': cookie.get('secure', False), 'httpOnly': cookie.get('httpOnly', False),
+                    'expires': cookie['expiry']
+                })
+        except Exception as e:
+            logging.warning(f"Impossible de recharger les cookies de consentement pour {hote}: {e}")
+            continue
+        if cookies:
+            with _verrou:
+                domaines.add(hote)
+            logging.info(f"  -> Consentement aux cookies restauré pour {hote} ({len(cookies)} cookie(s)).")
+
+def _empreinte_cookies(driver):
+    """Valeur de chaque cookie du domaine courant, par (nom, domaine)."""
+    return {(cookie['name'], cookie.get('domain')): cookie['value'] for cookie in driver.get_cookies()}
+
+def _sauvegarder(driver, hote, avant_clic):
+    """
+    Enregistre les cookies persistants (avec une date d'expiration) posés ou modifiés par le clic sur la bannière.
+    Les cookies déjà présents avant le clic (session, panier, jetons anti-bot...) ne sont pas conservés.
+    """
+    champs = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'expiry')
+    cookies = [
+        {champ: cookie[champ] for champ in champs if champ in cookie} for cookie in driver.get_cookies()
+        if 'expiry' in cookie and avant_clic.get((cookie['name'], cookie.get('domain'))) != cookie['value']
+    ]
+    if not cookies:
+        return
+    with _verrou:
+        consentements = _charger()
+        consentements[hote] = {'sauvegarde': time.time(), 'cookies': cookies}
+        fichier_temporaire = FICHIER_CONSENTEMENTS + ".tmp"
+        with open(fichier_temporaire, 'w', encoding='utf-8') as f:
+            json.dump(consentements, f)
+        os.replace(fichier_temporaire, FICHIER_CONSENTEMENTS)
+
+def accepter_banniere(driver, localisateur, delai=10):
+    """
+    Clique sur la bannière de cookies de la page courante si ce n'est pas déjà réglé pour son domaine.
+    - Domaine déjà réglé dans cette session (ou cookies restaurés) : retour immédiat, sans attente.
+    - Sinon on attend la bannière au plus `delai` secondes ; qu'elle soit cliquée ou absente,
+      le domaine est ensuite considéré comme réglé et les cookies posés par le clic sont sauvegardés.
+    Retourne True si un clic a eu lieu.
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    hote = domaine(driver.current_url)
+    with _verrou:
+        domaines = _domaines(driver)
+        if hote in domaines:
+            return False
+        domaines.add(hote)
+
+    wait = WebDriverWait(driver, delai)
+    try:
+        bouton = wait.until(EC.element_to_be_clickable(localisateur))
+        avant_clic = _empreinte_cookies(driver)
+        logging.info(f"  -> Bannière de cookies trouvée sur {hote}. Clic sur '{bouton.text}'...")
+        bouton.click()
+        wait.until(EC.invisibility_of_element(bouton))
+    except Exception:
+        logging.info(f"  -> Pas de bannière de cookies gérée visible sur {hote}.")
+        return False
+
+    try:
+        _sauvegarder(driver, hote, avant_clic)
+    except Exception as e:
+        logging.warning(f"Impossible de sauvegarder le consentement pour {hote}: {e}")
+    return True
@@ -0,0 +1,64 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+def domaine(url):
+    """Retourne le nom d'hôte d'une URL (ex: 'www.lego.com')."""
+    return urlparse(url).netloc.lower()
+
+def creer_session(headers=None, taille_pool=10):
+    """
+    Crée une session requests partagée : les connexions keep-alive sont réutilisées
+    d'une requête à l'autre au lieu d'ouvrir une nouvelle connexion TLS par URL.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=taille_pool, pool_maxsize=taille_pool)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def executer_en_parallele(taches, fonction, concurrence_globale=8, concurrence_par_domaine=1):
+    """
+    Exécute fonction(tache) pour chaque tâche (un dictionnaire avec une clé 'url') dans un pool de threads.
+    - concurrence_globale : nombre maximum de requêtes en vol, tous domaines confondus.
+    - concurrence_par_domaine : nombre maximum de requêtes simultanées vers un même hôte.
+    Le rythme de chaque domaine est imposé par scrapers.planificateur, appelé par les scrapers eux-mêmes.
+    Retourne les résultats dans l'ordre des tâches.
+    """
+    if not taches:
+        return []
+
+    # Une file par domaine : un domaine lent n'occupe jamais les créneaux des autres
+    files_par_domaine = {}
+    for index, tache in enumerate(taches):
+        files_par_domaine.setdefault(domaine(tache['url']), deque()).append((index, tache))
+
+    resultats = [None] * len(taches)
+    verrou = threading.Lock()
+    creneaux_globaux = threading.BoundedSemaphore(concurrence_globale)
+
+    def travailleur(file):
+        while True:
+            with verrou:
+                if not file:
+                    return
+                index, tache = file.popleft()
+            with creneaux_globaux:
+                try:
+                    resultats[index] = fonction(tache)
+                except Exception as e:
+                    logging.error(f"Erreur inattendue dans le moteur HTTP pour {tache['url']}: {e}")
+
+    logging.info(f"Moteur HTTP : {len(taches)} requêtes sur {len(files_par_domaine)} domaine(s), {concurrence_globale} en parallèle au maximum.")
+    nb_travailleurs = {hote: min(concurrence_par_domaine, len(file)) for hote, file in files_par_domaine.items()}
+    with ThreadPoolExecutor(max_workers=sum(nb_travailleurs.values())) as executor:
+        for hote, file in files_par_domaine.items():
+            for _ in range(nb_travailleurs[hote]):
+                executor.submit(travailleur, file)
+    return resultats
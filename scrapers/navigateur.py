@@ -0,0 +1,157 @@
+import logging
+import threading
+import weakref
+from . import consentement
+
+# Selenium et selenium-stealth ne sont importés qu'à la création d'un navigateur :
+# un lancement qui reste en HTTP ne les charge jamais
+
+# --- CONFIGURATION ---
+AGENT_UTILISATEUR = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+
+# Ressources bloquées via le protocole DevTools, par catégorie (motifs d'URL de Network.setBlockedURLs)
+CATEGORIES_BLOCAGE = {
+    "images": ["*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "medias": ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*"],
+    "polices": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"],
+    "tiers": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+        "*facebook.net*", "*connect.facebook.com*", "*criteo.com*", "*criteo.net*", "*hotjar.com*",
+        "*bat.bing.com*", "*analytics.tiktok.com*", "*adnxs.com*", "*contentsquare.net*", "*abtasty.com*",
+        "*kameleoon.eu*", "*trustpilot.com*",
+    ],
+}
+# Par défaut tout est bloqué ; un site peut restreindre la liste avec la clé "blocage" de CONFIG_SITES ([] = rien)
+BLOCAGE_DEFAUT = tuple(CATEGORIES_BLOCAGE)
+
+_verrou_pool = threading.Lock()
+# Pool de navigateurs partagé entre les étapes d'un même processus (voir pipeline.py) :
+# None = pas de pool, chaque navigateur est fermé dès qu'il est libéré
+_pool = None
+_cle_par_driver = weakref.WeakKeyDictionary()
+
+def creer_options(headless=True):
+    """Options Chrome communes à tous les scrapers : headless, anti-détection et chargement 'eager'."""
+    from selenium.webdriver.chrome.options import Options
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-gpu")
+    options.add_argument(f"user-agent={AGENT_UTILISATEUR}")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    # driver.get() rend la main dès que le DOM est prêt, sans attendre images, iframes et scripts tiers :
+    # les scrapers attendent de toute façon explicitement l'élément qui les intéresse
+    options.page_load_strategy = 'eager'
+    return options
+
+def bloquer_ressources(driver, categories=BLOCAGE_DEFAUT):
+    """Demande à Chrome de ne pas télécharger les ressources des catégories indiquées (images, polices, traqueurs...)."""
+    motifs = [motif for categorie in categories for motif in CATEGORIES_BLOCAGE.get(categorie, [])]
+    if not motifs:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': motifs})
+        logging.info(f"  -> Ressources bloquées : {', '.join(categories)}.")
+    except Exception as e:
+        logging.warning(f"Impossible d'activer le blocage des ressources : {e}")
+
+def creer_driver(blocage=BLOCAGE_DEFAUT, furtif=False, headless=True):
+    """
+    Crée un navigateur Chrome configuré pour le scraping :
+    chargement 'eager', blocage des ressources inutiles, consentements aux cookies restaurés
+    et, si demandé, mode stealth pour les sites qui détectent Selenium.
+    """
+    from selenium import webdriver
+    driver = webdriver.Chrome(options=creer_options(headless))
+    if furtif:
+        from selenium_stealth import stealth
+        stealth(driver,
+                languages=["fr-FR", "fr"],
+                vendor="Google Inc.",
+                platform="Win32",
+                webgl_vendor="Intel Inc.",
+                renderer="Intel Iris OpenGL Engine",
+                fix_hairline=True)
+    bloquer_ressources(driver, blocage)
+    consentement.injecter_cookies(driver)
+    return driver
+
+# --- POOL DE NAVIGATEURS ---
+def demarrer_pool():
+    """Active le pool : les navigateurs libérés sont gardés ouverts pour les étapes suivantes au lieu d'être fermés."""
+    global _pool
+    with _verrou_pool:
+        if _pool is None:
+            _pool = {}
+
+def est_vivant(driver):
+    """Vérifie que la session Chrome répond encore (un navigateur planté ou fermé lève une exception)."""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+def _fermer(driver):
+    try:
+        driver.quit()
+    except Exception as e:
+        logging.debug(f"Erreur à la fermeture d'un navigateur : {e}")
+
+def obtenir_driver(blocage=BLOCAGE_DEFAUT, furtif=False, headless=True):
+    """
+    Comme creer_driver, mais réutilise si possible un navigateur du pool ayant la même configuration
+    (ressources bloquées, mode stealth). Un navigateur du pool qui ne répond plus est fermé et remplacé.
+    À rendre avec liberer_driver.
+    """
+    cle = (tuple(blocage), furtif, headless)
+    while True:
+        with _verrou_pool:
+            if not (_pool and _pool.get(cle)):
+                break
+            driver = _pool[cle].pop()
+        if est_vivant(driver):
+            logging.info("  -> Réutilisation d'un navigateur du pool.")
+            return driver
+        logging.warning("  -> Navigateur du pool hors service, il est fermé.")
+        _fermer(driver)
+    driver = creer_driver(blocage=blocage, furtif=furtif, headless=headless)
+    with _verrou_pool:
+        _cle_par_driver[driver] = cle
+    return driver
+
+def liberer_driver(driver, reutilisable=True):
+    """
+    Rend un navigateur obtenu par obtenir_driver : il retourne au pool s'il est actif, sinon il est fermé.
+    Un navigateur dans un état douteux (erreur pendant sa préparation, session perdue...) est fermé
+    avec reutilisable=False ; un navigateur qui ne répond plus n'est jamais remis dans le pool.
+    """
+    with _verrou_pool:
+        cle = _cle_par_driver.get(driver)
+        a_garder = reutilisable and _pool is not None and cle is not None
+    if a_garder and est_vivant(driver):
+        with _verrou_pool:
+            if _pool is not None:
+                _pool.setdefault(cle, []).append(driver)
+                return
+    _fermer(driver)
+
+def fermer_pool():
+    """Ferme tous les navigateurs du pool et le désactive."""
+    global _pool
+    with _verrou_pool:
+        drivers = [driver for drivers_cle in (_pool or {}).values() for driver in drivers_cle]
+        _pool = None
+    for driver in drivers:
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"Erreur à la fermeture d'un navigateur du pool : {e}")
+    if drivers:
+        logging.info(f"{len(drivers)} navigateur(s) du pool fermé(s).")
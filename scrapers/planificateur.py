@@ -0,0 +1,113 @@
+import logging
+import os
+import random
+import threading
+import time
+from .moteur_http import domaine
+
+# --- CONFIGURATION ---
+REQUETES_PAR_MINUTE_DEFAUT = 12 # Soit une page toutes les 5 secondes par site, comme l'ancienne pause fixe
+RAFALE_DEFAUT = 1 # Nombre de requêtes autorisées d'affilée avant d'attendre
+GIGUE = 0.3 # Jusqu'à +30% d'attente aléatoire pour ne pas avoir un rythme trop régulier
+CODES_RALENTISSEMENT = (429, 503)
+BACKOFF_INITIAL = 30
+BACKOFF_MAX = 600
+# Pause cumulée maximale par domaine et par lancement : au-delà, un site qui répond toujours 429/503
+# (mur anti-bot) n'immobilise plus le run, les tâches échouent vite et passent au palier suivant
+BACKOFF_CUMULE_MAX = int(os.getenv("BACKOFF_CUMULE_MAX", 900))
+
+# Un seau à jetons par domaine, partagé par tous les scrapers du processus
+_seaux = {}
+_verrou = threading.Lock()
+
+def _seau(hote):
+    """Retourne (en le créant si besoin) l'état du seau à jetons d'un domaine. Appelé sous verrou."""
+    if hote not in _seaux:
+        _seaux[hote] = {
+            'debit': REQUETES_PAR_MINUTE_DEFAUT / 60,
+            'capacite': RAFALE_DEFAUT,
+            'jetons': RAFALE_DEFAUT,
+            'derniere_maj': time.monotonic(),
+            'pause_jusqua': 0,
+            'pause_cumulee': 0,
+            'echecs': 0
+        }
+    return _seaux[hote]
+
+def configurer_domaine(url_ou_domaine, requetes_par_minute=None, rafale=None):
+    """Fixe le débit autorisé pour un domaine (accepte une URL complète ou un nom d'hôte)."""
+    hote = domaine(url_ou_domaine) if "://" in url_ou_domaine else url_ou_domaine.lower()
+    with _verrou:
+        seau = _seau(hote)
+        if requetes_par_minute:
+            seau['debit'] = requetes_par_minute / 60
+        if rafale:
+            seau['capacite'] = rafale
+            seau['jetons'] = min(seau['jetons'], rafale)
+
+def attendre_creneau(url, palier="http"):
+    """
+    Bloque jusqu'au prochain créneau autorisé pour le domaine de l'URL, puis le consomme.
+    Les requêtes vers des domaines différents ne s'attendent jamais entre elles.
+    Avec palier="navigateur", seul le débit est respecté : la pause de backoff vient des réponses 429/503
+    du palier HTTP (souvent un mur anti-bot) et ne doit pas retarder le navigateur qui prend le relais.
+    """
+    hote = domaine(url)
+    while True:
+        with _verrou:
+            seau = _seau(hote)
+            maintenant = time.monotonic()
+            seau['jetons'] = min(seau['capacite'], seau['jetons'] + (maintenant - seau['derniere_maj']) * seau['debit'])
+            seau['derniere_maj'] = maintenant
+            pause_jusqua = seau['pause_jusqua'] if palier == "http" else 0
+            if maintenant >= pause_jusqua and seau['jetons'] >= 1:
+                seau['jetons'] -= 1
+                return
+            attente = max(pause_jusqua - maintenant, (1 - seau['jetons']) / seau['debit'])
+        time.sleep(attente * (1 + random.uniform(0, GIGUE)))
+
+def signaler_reponse(url, code_statut, retry_after=None):
+    """
+    À appeler après chaque réponse HTTP. Sur un 429/503, le domaine est mis en pause
+    (Retry-After s'il est fourni, sinon un backoff exponentiel ; au plus BACKOFF_MAX) ; toute autre réponse remet le compteur à zéro.
+    Le total des pauses d'un domaine sur le lancement est plafonné à BACKOFF_CUMULE_MAX.
+    """
+    hote = domaine(url)
+    with _verrou:
+        seau = _seau(hote)
+        if code_statut not in CODES_RALENTISSEMENT:
+            seau['echecs'] = 0
+            return
+        seau['echecs'] += 1
+        try:
+            pause = min(max(float(retry_after), 0), BACKOFF_MAX) # Un Retry-After démesuré ne bloque pas tout le run
+        except (TypeError, ValueError):
+            pause = min(BACKOFF_INITIAL * 2 ** (seau['echecs'] - 1), BACKOFF_MAX)
+        pause *= 1 + random.uniform(0, GIGUE)
+        pause = min(pause, max(BACKOFF_CUMULE_MAX - seau['pause_cumulee'], 0))
+        seau['pause_cumulee'] += pause
+        if pause > 0:
+            maintenant = time.monotonic()
+            seau['pause_jusqua'] = max(seau['pause_jusqua'], maintenant + pause)
+            seau['jetons'] = 0
+            seau['derniere_maj'] = maintenant
+    if pause > 0:
+        logging.warning(f"{hote} a répondu {code_statut}. Pause de {pause:.0f}s pour ce domaine.")
+    else:
+        logging.warning(f"{hote} a répondu {code_statut}. Budget de backoff du lancement épuisé, pas de nouvelle pause.")
+
+def requete_get(client, url, tentatives_max=3, **kwargs):
+    """
+    GET poli : attend le créneau du domaine, signale la réponse au planificateur
+    et réessaie après le backoff si le site demande de ralentir.
+    `client` est une session requests ou le module requests lui-même.
+    Un palier HTTP qui peut escalader vers le navigateur passe tentatives_max=1 : un 429/503 y est
+    le plus souvent un mur anti-bot, qu'il vaut mieux confier tout de suite au navigateur.
+    """
+    for tentative in range(1, tentatives_max + 1):
+        attendre_creneau(url)
+        reponse = client.get(url, **kwargs)
+        signaler_reponse(url, reponse.status_code, reponse.headers.get('Retry-After'))
+        if reponse.status_code not in CODES_RALENTISSEMENT or tentative == tentatives_max:
+            return reponse
+        logging.info(f"  -> Nouvelle tentative {tentative + 1}/{tentatives_max} pour {url} après le backoff.")
@@ -1,32 +1,74 @@
 import logging
 import re
 import requests
-from bs4 import BeautifulSoup
+from . import planificateur
+from . import cache_http
+from . import strategie
+from .analyse_html import parser_page
 
-def scrape(url, headers, selecteur):
-    try:
-        reponse = requests.get(url, headers=headers, verify=False, timeout=10)
-        reponse.raise_for_status()
-        soup = BeautifulSoup(reponse.content, 'html.parser')
+def extraire_prix(contenu, selecteur, url):
+    """Extrait le prix d'une page HTML avec le sélecteur CSS du site."""
+    soup = parser_page(contenu, selecteur)
+    
+    element_prix = soup.select_one(selecteur)
+    if not element_prix:
+        logging.warning(f"Sélecteur '{selecteur}' non trouvé sur {url}")
+        return None
         
-        element_prix = soup.select_one(selecteur)
-        if not element_prix:
-            logging.warning(f"Sélecteur '{selecteur}' non trouvé sur {url}")
-            return None
-            
-        prix_texte_brut = element_prix.get_text()
+    prix_texte_brut = element_prix.get_text()
+    
+    match = re.search(r'\b(\d+[.,]\d{1,2})\b', prix_texte_brut)
+    if match:
+        return float(match.group(1).replace(',', '.'))
         
-        match = re.search(r'\b(\d+[.,]\d{1,2})\b', prix_texte_brut)
-        if match:
-            return float(match.group(1).replace(',', '.'))
-            
-        match_entier = re.search(r'(\d+)\s*€', prix_texte_brut)
-        if match_entier:
-            return float(match_entier.group(1))
+    match_entier = re.search(r'(\d+)\s*€', prix_texte_brut)
+    if match_entier:
+        return float(match_entier.group(1))
 
-        logging.warning(f"Aucun motif de prix trouvé dans le texte '{prix_texte_brut.strip()}'")
-        return None
+    logging.warning(f"Aucun motif de prix trouvé dans le texte '{prix_texte_brut.strip()}'")
+    return None
+
+def scrape(url, headers, selecteur, session=None):
+    try:
+        # Avec une session partagée, la connexion keep-alive au site est réutilisée
+        client = session if session is not None else requests
+
+        # Requête conditionnelle : si la page n'a pas changé, le serveur répond 304 sans la renvoyer
+        entree_cache = cache_http.charger_entree(url)
+        en_tetes = {**(headers or {}), **cache_http.en_tetes_conditionnels(entree_cache)}
+        reponse = planificateur.requete_get(client, url, headers=en_tetes, verify=False, timeout=10)
+
+        if reponse.status_code == 304 and entree_cache:
+            logging.info(f"  -> Page inchangée (304) pour {url}, réutilisation du dernier prix.")
+            prix = entree_cache.get('prix')
+            if prix is None:
+                corps = cache_http.lire_corps(url)
+                prix = extraire_prix(corps, selecteur, url) if corps else None
+            cache_http.marquer_hit(url, entree_cache, prix)
+            return prix
+
+        if strategie.est_un_mur(reponse):
+            logging.warning(f"  -> Page de blocage (HTTP {reponse.status_code}) pour {url}")
+            return None
+        reponse.raise_for_status()
+        prix = extraire_prix(reponse.content, selecteur, url)
+        cache_http.enregistrer(url, reponse, prix)
+        return prix
         
     except Exception as e:
         logging.error(f"Erreur en récupérant le prix pour {url}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def scrape_navigateur(driver, url, selecteur):
+    """Palier navigateur : charge la page dans Chrome (JavaScript exécuté) puis lit le prix avec le même sélecteur."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    try:
+        planificateur.attendre_creneau(url, palier="navigateur")
+        driver.get(url)
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, selecteur)))
+        return extraire_prix(driver.page_source, selecteur, url)
+    except Exception as e:
+        logging.error(f"Erreur en récupérant le prix pour {url} via le navigateur: {e}")
+        return None
@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+import threading
+
+# --- CONFIGURATION ---
+FICHIER_STRATEGIE = "strategie_sites.json"
+# Paliers de récupération, du moins coûteux au plus coûteux
+PALIERS = ("http", "navigateur")
+SEUIL_REUSSITE_HTTP = 0.5 # En dessous de ce taux de réussite en HTTP, un site démarre directement en navigateur
+ESSAIS_MIN = 3 # Nombre d'essais (pondérés) avant de faire confiance au taux de réussite
+# Les statistiques sont atténuées à chaque lancement : un site passé en navigateur est réessayé en HTTP
+# au bout de quelques jours, au cas où il serait redevenu accessible
+DECROISSANCE = 0.7
+
+# Réponses qui ressemblent à un mur anti-bot plutôt qu'à une page produit
+CODES_MUR = (403, 429, 503)
+MARQUEURS_MUR = (
+    "captcha", "robot check", "are you a robot", "cf-chl", "challenge-platform",
+    "datadome", "px-captcha", "access denied", "accès refusé",
+)
+
+_verrou = threading.Lock()
+_resultats_du_lancement = {}
+
+def est_un_mur(reponse):
+    """Indique si une réponse HTTP ressemble à une page de blocage (captcha, challenge, accès refusé)."""
+    if reponse.status_code in CODES_MUR:
+        return True
+    debut_page = reponse.content[:20000].decode('utf-8', errors='ignore').lower()
+    return any(marqueur in debut_page for marqueur in MARQUEURS_MUR)
+
+def _charger():
+    try:
+        with open(FICHIER_STRATEGIE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def palier_initial(site, paliers_autorises=PALIERS):
+    """
+    Choisit le palier par lequel commencer pour un site, d'après ses statistiques des lancements précédents :
+    HTTP tant qu'il n'est pas prouvé qu'il échoue, le navigateur sinon.
+    """
+    paliers_autorises = [palier for palier in PALIERS if palier in paliers_autorises]
+    if len(paliers_autorises) == 1:
+        return paliers_autorises[0]
+
+    stats_http = _charger().get(site, {}).get("http", {})
+    essais = stats_http.get("essais", 0)
+    if essais < ESSAIS_MIN:
+        return "http"
+    taux = stats_http.get("succes", 0) / essais
+    return "http" if taux >= SEUIL_REUSSITE_HTTP else "navigateur"
+
+def enregistrer_resultat(site, palier, succes):
+    """Comptabilise le résultat d'une tentative (prix trouvé ou non) pour ce lancement."""
+    with _verrou:
+        stats = _resultats_du_lancement.setdefault(site, {}).setdefault(palier, {"essais": 0, "succes": 0})
+        stats["essais"] += 1
+        stats["succes"] += int(bool(succes))
+
+def sauvegarder():
+    """Fusionne les résultats du lancement dans le fichier de statistiques (écriture atomique)."""
+    with _verrou:
+        statistiques = _charger()
+        for paliers in statistiques.values():
+            for stats in paliers.values():
+                stats["essais"] = round(stats.get("essais", 0) * DECROISSANCE, 3)
+                stats["succes"] = round(stats.get("succes", 0) * DECROISSANCE, 3)
+        for site, paliers in _resultats_du_lancement.items():
+            for palier, resultat in paliers.items():
+                stats = statistiques.setdefault(site, {}).setdefault(palier, {"essais": 0, "succes": 0})
+                stats["essais"] += resultat["essais"]
+                stats["succes"] += resultat["succes"]
+
+        fichier_temporaire = FICHIER_STRATEGIE + ".tmp"
+        with open(fichier_temporaire, 'w', encoding='utf-8') as f:
+            json.dump(statistiques, f, indent=2, sort_keys=True)
+        os.replace(fichier_temporaire, FICHIER_STRATEGIE)
+
+def journaliser():
+    """Écrit dans le journal le bilan par site et par palier de ce lancement."""
+    with _verrou:
+        for site, paliers in sorted(_resultats_du_lancement.items()):
+            bilan = ", ".join(f"{palier} {stats['succes']}/{stats['essais']}" for palier, stats in paliers.items())
+            logging.info(f"Stratégie {site} : {bilan}")
@@ -1,12 +1,10 @@
 import time
 import logging
 from bs4 import BeautifulSoup
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium_stealth import stealth
+from scrapers import navigateur
 
 # --- CONFIGURATION DU TEST ---
 # Mettez ici l'URL exacte du produit Carrefour que vous voulez tester
@@ -25,23 +23,9 @@ def test_carrefour_scraper():
     """
     logging.info(f"Début du test pour Carrefour sur l'URL : {URL_CARREFOUR}")
     
-    # --- Création du Driver Selenium "Furtif" ---
-    options = Options()
-    # Mettez la ligne suivante en commentaire pour voir le navigateur s'exécuter
-    # options.add_argument("--headless=new") 
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-gpu")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    
-    driver = webdriver.Chrome(options=options)
-    
-    # On applique la cape d'invisibilité
-    stealth(driver, languages=["fr-FR", "fr"], vendor="Google Inc.", platform="Win32", webgl_vendor="Intel Inc.", renderer="Intel Iris OpenGL Engine", fix_hairline=True)
+    # --- Création du Driver Selenium "Furtif" (cape d'invisibilité comprise) ---
+    # Passez headless=True pour ne plus voir le navigateur s'exécuter
+    driver = navigateur.creer_driver(furtif=True, headless=False)
     
     wait = WebDriverWait(driver, 10)
     prix_final = None
@@ -1,12 +1,10 @@
 import time
 import re
 from bs4 import BeautifulSoup
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium_stealth import stealth
+from scrapers import navigateur
 
 # --- CONFIGURATION DES TESTS ---
 # Collez ici les URL des produits que vous voulez tester
@@ -20,20 +18,8 @@ URLS_A_TESTER = {
 def scrape_site(nom_site, url):
     print(f"--- Test du site : {nom_site} ---")
     
-    # Configuration Selenium Stealth (notre meilleure arme)
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-gpu")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    
-    driver = webdriver.Chrome(options=options)
-    stealth(driver, languages=["fr-FR", "fr"], vendor="Google Inc.", platform="Win32", webgl_vendor="Intel Inc.", renderer="Intel Iris OpenGL Engine", fix_hairline=True)
+    # Configuration Selenium Stealth (notre meilleure arme), avec la même configuration que les scrapers
+    driver = navigateur.creer_driver(furtif=True)
     
     wait = WebDriverWait(driver, 15) # On met un peu plus de temps d'attente
 